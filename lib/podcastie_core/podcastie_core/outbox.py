@@ -0,0 +1,69 @@
+import time
+
+import podcastie_rss
+from beanie import PydanticObjectId
+from podcastie_database.models.outbox import (
+    OutboxAudioFileModel,
+    OutboxClaimModel,
+    OutboxEpisodeDocument,
+    OutboxEpisodeModel,
+)
+from podcastie_database.models.podcast import PodcastMetaModel
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+async def add_episode(
+    podcast_id: PydanticObjectId, podcast: PodcastMetaModel, episode: podcastie_rss.Episode, recipients: list[int]
+) -> None:
+    # adding an episode which has already been added is a no-op, so that episodes detected again
+    # (e.g. when feed poller has stopped before saving the podcast) are not delivered twice:
+    document = OutboxEpisodeDocument(
+        podcast_id=podcast_id,
+        podcast=podcast,
+        episode=OutboxEpisodeModel(
+            published=episode.published,
+            title=episode.title,
+            description=episode.description,
+            link=episode.link,
+            audio_file=OutboxAudioFileModel(url=episode.audio_file.url, size=episode.audio_file.size),
+            art_url=episode.art_url,
+        ),
+        recipients=recipients,
+        created_at=int(time.time()),
+    )
+    try:
+        await document.insert()
+    except DuplicateKeyError:
+        pass
+
+
+async def claim_episode(owner: str, lease: int) -> OutboxEpisodeDocument | None:
+    # the earliest added episode which is not delivered yet and is not being delivered by another broadcaster
+    # is claimed for lease seconds atomically, returns None if there are no such episodes:
+    now = int(time.time())
+    document = await OutboxEpisodeDocument.get_motor_collection().find_one_and_update(
+        {"delivered_at": None, "$or": [{"claim": None}, {"claim.expires_at": {"$lte": now}}]},
+        {"$set": {"claim": OutboxClaimModel(owner=owner, expires_at=now + lease).model_dump()}},
+        sort=[("delivered_at", 1), ("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+    if document is None:
+        return None
+
+    return OutboxEpisodeDocument.model_validate(document)
+
+
+async def episode_delivered_to(episode: OutboxEpisodeDocument, user_id: int, owner: str, lease: int) -> bool:
+    # the claim is extended, as delivering an episode to every recipient may take longer than lease seconds.
+    # returns False if the episode has been claimed by another broadcaster meanwhile:
+    result = await OutboxEpisodeDocument.find_one({"_id": episode.id, "claim.owner": owner}).update(
+        {"$pull": {"recipients": user_id}, "$set": {"claim.expires_at": int(time.time()) + lease}}
+    )
+    return result.matched_count > 0
+
+
+async def episode_delivered(episode: OutboxEpisodeDocument, owner: str) -> None:
+    await OutboxEpisodeDocument.find_one({"_id": episode.id, "claim.owner": owner}).update(
+        {"$set": {"delivered_at": int(time.time()), "claim": None}}
+    )
@@ -1,10 +1,17 @@
 import hashlib
+import secrets
 import string
 import time
 
 import podcastie_rss
 from beanie import PydanticObjectId
-from podcastie_database.models.podcast import PodcastCheckModel, PodcastDocument, PodcastMetaModel
+from podcastie_database.models.podcast import (
+    PodcastCheckModel,
+    PodcastDocument,
+    PodcastFeedValidatorsModel,
+    PodcastMetaModel,
+    PodcastWebSubModel,
+)
 
 PODCAST_FEED_URL_HASH_PREFIX_LEN = 8
 
@@ -90,6 +97,22 @@ class Podcast:
                 timestamp=int(time.time()),
                 success=True,
             ),
+            feed_validators=PodcastFeedValidatorsModel(
+                etag=feed.validators.etag,
+                last_modified=feed.validators.last_modified,
+                digest=feed.validators.digest,
+            ),
+            # subscription to the WebSub hub the feed is delivered by is requested later by feed poller:
+            websub=(
+                PodcastWebSubModel(
+                    hub_url=feed.websub.hub_url,
+                    topic_url=feed.websub.topic_url,
+                    secret=secrets.token_hex(32),
+                    requested_at=0,
+                )
+                if feed.websub
+                else None
+            ),
             latest_episode_publication_timestamp=feed.latest_episode.published if feed.latest_episode else None,
         )
 
@@ -97,13 +120,13 @@ class Podcast:
         return cls(document)
 
     @classmethod
-    async def new_from_feed_url(cls, feed_url: str):
+    async def new_from_feed_url(cls, feed_url: str, feed_client: podcastie_rss.FeedClient):
         try:
-            feed = await podcastie_rss.fetch_feed(feed_url)
+            feed = await podcastie_rss.fetch_feed(feed_client, feed_url)
         except podcastie_rss.FeedError as e:
             raise PodcastFeedError("failed to fetch podcast feed") from e
 
         return await cls.new_from_feed(feed, feed_url)
 
     async def save_changes(self) -> None:
-        await self._document.save()
+        await self._document.save_changes()
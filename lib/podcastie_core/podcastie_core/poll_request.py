@@ -0,0 +1,24 @@
+import time
+
+from beanie import PydanticObjectId
+from podcastie_database.models.poll_request import PollRequestDocument
+from pymongo.errors import DuplicateKeyError
+
+
+async def request_poll(podcast_id: PydanticObjectId) -> None:
+    # requesting a check of a podcast which is already requested is a no-op:
+    try:
+        await PollRequestDocument(podcast_id=podcast_id, requested_at=int(time.time())).insert()
+    except DuplicateKeyError:
+        pass
+
+
+async def take_poll_request() -> PydanticObjectId | None:
+    # the earliest request is taken and removed atomically, so that only one of feed poller replicas serves it.
+    # returns None if there are no requests. a request lost along with the replica which has taken it is not retried,
+    # as the podcast is checked on its schedule anyway:
+    document = await PollRequestDocument.get_motor_collection().find_one_and_delete({}, sort=[("requested_at", 1)])
+    if document is None:
+        return None
+
+    return document["podcast_id"]
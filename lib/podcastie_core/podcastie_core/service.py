@@ -1,8 +1,14 @@
+import secrets
+import time
+from typing import Any, AsyncIterator
+
+from beanie import BulkWriter, PydanticObjectId
 from beanie.odm.operators.find.evaluation import Text
-from podcastie_database.models.podcast import PodcastDocument
+from podcastie_database.models.podcast import PodcastDocument, PodcastLeaseModel, PodcastPollingModel
 from podcastie_database.models.user import UserDocument
 
-from podcastie_core.podcast import Podcast
+from podcastie_core.podcast import Podcast, PodcastNotFoundError
+from podcastie_core.poll_request import request_poll
 from podcastie_core.user import User, UserDoesNotFollowPodcastError, UserFollowsPodcastError
 
 
@@ -10,9 +16,27 @@ async def follow_podcast(user: User, podcast: Podcast) -> None:
     if user_is_following_podcast(user, podcast):
         raise UserFollowsPodcastError("user is following the provided podcast")
 
+    # dormant podcast is woken up before it's followed, so that it can't be deleted in between:
+    await _wake_podcast(podcast)
+
     user.document.subscriptions.append(podcast.document.id)
     await user.save_changes()
 
+    # feed poller is asked to check the podcast right away rather than on its schedule,
+    # as podcasts without followers are hardly checked:
+    await request_poll(podcast.document.id)
+
+
+async def _wake_podcast(podcast: Podcast) -> None:
+    # raises PodcastNotFoundError if the podcast has been deleted since it was loaded:
+    result = await PodcastDocument.find_one(PodcastDocument.id == podcast.document.id).update(
+        {"$set": {"dormant_since": None}}
+    )
+    if result.matched_count == 0:
+        raise PodcastNotFoundError("podcast does not exist")
+
+    podcast.document.dormant_since = None
+
 
 async def unfollow_podcast(user: User, podcast: Podcast) -> None:
     if not user_is_following_podcast(user, podcast):
@@ -32,17 +56,124 @@ async def user_subscriptions(user: User) -> list[Podcast]:
     return [await Podcast.from_object_id(object_id) for object_id in user.document.subscriptions]
 
 
-async def podcast_followers(podcast: Podcast) -> list[User]:
-    models = await UserDocument.find(UserDocument.subscriptions == podcast.document.id).to_list()
+async def podcast_followers(podcast_id: PydanticObjectId) -> list[User]:
+    models = await UserDocument.find(UserDocument.subscriptions == podcast_id).to_list()
     return [User(model) for model in models]
 
 
+async def followed_podcast_ids() -> set[PydanticObjectId]:
+    # ids of podcasts followed by at least one user, collected by the database in a single pass over users:
+    pipeline = [
+        {"$unwind": "$subscriptions"},
+        {"$group": {"_id": "$subscriptions"}},
+    ]
+    return {result["_id"] for result in await UserDocument.aggregate(pipeline).to_list()}
+
+
 async def search_podcasts(query: str) -> list[Podcast]:
     models = await PodcastDocument.find(Text(query)).to_list()
     return [Podcast(model) for model in models]
 
 
-async def all_podcasts() -> list[Podcast]:
-    # todo: async iterable
-    models = await PodcastDocument.find().to_list()
-    return [Podcast(model) for model in models]
+def _claimable(at: int) -> dict[str, Any]:
+    # podcasts which are not claimed, or whose lease has expired by the time:
+    return {"$or": [{"lease": None}, {"lease.expires_at": {"$lte": at}}]}
+
+
+async def claim_due_podcasts(
+    now: int, owner: str, lease: int, batch_size: int = 100
+) -> AsyncIterator[PodcastPollingModel]:
+    # due podcasts are claimed for lease seconds in batches, so that replicas of feed poller check different podcasts.
+    # a batch is claimed only when the previous one is consumed, and it's loaded with only the fields feed poller needs,
+    # so that podcasts are not claimed long before being checked, and memory use does not grow with their number.
+    # the longest overdue podcasts go first, documents which have never been scheduled (lack next_check_at) are due too.
+    # dormant podcasts are never due, so that the podcasts looked through are only the followed ones:
+    due = {"dormant_since": None, "next_check_at": {"$not": {"$gt": now}}}
+    while True:
+        claimed_at = int(time.time())
+        claimable = {**due, **_claimable(claimed_at)}
+        candidates = await PodcastDocument.aggregate(
+            [
+                {"$match": claimable},
+                {"$sort": {"next_check_at": 1}},
+                {"$limit": batch_size},
+                {"$project": {"_id": 1}},
+            ]
+        ).to_list()
+        if not candidates:
+            return
+
+        # every podcast is claimed atomically, so only one of replicas claiming it at the same time gets it,
+        # the token tells podcasts this replica has got:
+        ids = [candidate["_id"] for candidate in candidates]
+        token = secrets.token_hex(16)
+        await PodcastDocument.find({"_id": {"$in": ids}, **claimable}).update(
+            {"$set": {"lease": PodcastLeaseModel(owner=owner, token=token, expires_at=claimed_at + lease)}}
+        )
+
+        claimed = PodcastDocument.find(
+            {"_id": {"$in": ids}, "lease.token": token},
+            projection_model=PodcastPollingModel,
+        ).sort("+next_check_at")
+        async for podcast in claimed:
+            yield podcast
+
+
+async def claim_podcast(podcast_id: PydanticObjectId, owner: str, lease: int) -> PodcastPollingModel | None:
+    # the podcast is claimed for lease seconds whether it's due or not (e.g. when its check is requested).
+    # returns None if it does not exist or is claimed by another replica, which is checking it then:
+    claimed_at = int(time.time())
+    token = secrets.token_hex(16)
+    result = await PodcastDocument.find_one({"_id": podcast_id, **_claimable(claimed_at)}).update(
+        {"$set": {"lease": PodcastLeaseModel(owner=owner, token=token, expires_at=claimed_at + lease)}}
+    )
+    if result.matched_count == 0:
+        return None
+
+    return await PodcastDocument.find_one(
+        {"_id": podcast_id, "lease.token": token},
+        projection_model=PodcastPollingModel,
+    )
+
+
+async def polling_podcast(podcast_id: PydanticObjectId) -> PodcastPollingModel | None:
+    return await PodcastDocument.find_one(PodcastDocument.id == podcast_id, projection_model=PodcastPollingModel)
+
+
+async def set_podcast_fields(
+    podcast_id: PydanticObjectId,
+    fields: dict[str, Any],
+    bulk_writer: BulkWriter | None = None,
+) -> None:
+    # fields are set by their (dotted) paths, so that fields updated concurrently by others are left intact.
+    # if bulk_writer is provided, the update is only added to it and is done when the writer is committed:
+    await PodcastDocument.find_one(PodcastDocument.id == podcast_id).update({"$set": fields}, bulk_writer=bulk_writer)
+
+
+async def set_podcast_fields_if(podcast_id: PydanticObjectId, expected: dict[str, Any], fields: dict[str, Any]) -> bool:
+    # fields are only set if the podcast still has the expected values (compare-and-set),
+    # returns whether they have been set:
+    result = await PodcastDocument.find_one({"_id": podcast_id, **expected}).update({"$set": fields})
+    return result.matched_count > 0
+
+
+async def wake_followed_podcasts(followed: set[PydanticObjectId]) -> int:
+    # dormant podcasts which are followed (e.g. as they were followed while being found to have no followers)
+    # are woken up, returns their number:
+    result = await PodcastDocument.find({"dormant_since": {"$ne": None}, "_id": {"$in": list(followed)}}).update(
+        {"$set": {"dormant_since": None}}
+    )
+    return result.modified_count
+
+
+async def delete_dormant_podcasts(dormant_before: int, followed: set[PydanticObjectId]) -> int:
+    # podcasts dormant since before the time are deleted, unless they're followed, returns their number:
+    result = await PodcastDocument.find(
+        {"dormant_since": {"$lte": dormant_before}, "_id": {"$nin": list(followed)}}
+    ).delete()
+    return result.deleted_count if result else 0
+
+
+async def all_podcasts(batch_size: int = 1000) -> AsyncIterator[Podcast]:
+    async for model in PodcastDocument.find(batch_size=batch_size):
+        yield Podcast(model)
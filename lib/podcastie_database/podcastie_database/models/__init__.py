@@ -1 +1 @@
-from . import podcast, user
+from . import outbox, podcast, poll_request, telegram_file, user
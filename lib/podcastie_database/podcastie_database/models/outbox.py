@@ -0,0 +1,54 @@
+import pymongo
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel
+
+from podcastie_database.models.podcast import PodcastMetaModel
+
+
+class OutboxAudioFileModel(BaseModel):
+    url: str
+    size: int  # size in bytes
+
+
+class OutboxEpisodeModel(BaseModel):
+    published: int
+    title: str
+    description: str | None
+    link: str | None
+    audio_file: OutboxAudioFileModel
+    art_url: str | None
+
+
+class OutboxClaimModel(BaseModel):
+    """Claim of the episode by a broadcaster, so that broadcasters don't deliver the same episodes."""
+
+    owner: str  # broadcaster which has claimed the episode
+    expires_at: int  # timestamp other broadcasters may claim the episode after
+
+
+class OutboxEpisodeDocument(Document):
+    """New episode of a podcast which is to be delivered to followers of the podcast."""
+
+    podcast_id: PydanticObjectId
+    podcast: PodcastMetaModel  # metadata of the podcast when the episode was published
+    episode: OutboxEpisodeModel
+
+    recipients: list[int]  # IDs of users the episode has not been delivered to yet
+    created_at: int
+    delivered_at: int | None = None  # None until the episode is delivered to every recipient
+    claim: OutboxClaimModel | None = None  # None if the episode is not being delivered
+
+    class Settings:
+        name = "episode_outbox"
+        indexes = [
+            # an episode is added to the outbox once, however many times it's detected:
+            pymongo.IndexModel(
+                [
+                    ("podcast_id", pymongo.ASCENDING),
+                    ("episode.published", pymongo.ASCENDING),
+                    ("episode.title", pymongo.ASCENDING),
+                ],
+                unique=True,
+            ),
+            [("delivered_at", pymongo.ASCENDING), ("created_at", pymongo.ASCENDING)],
+        ]
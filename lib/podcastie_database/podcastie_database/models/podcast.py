@@ -1,8 +1,8 @@
 import warnings
 
 import pymongo
-from beanie import Document, Indexed
-from pydantic import BaseModel
+from beanie import Document, Indexed, PydanticObjectId
+from pydantic import BaseModel, Field
 
 
 class PodcastMetaModel(BaseModel):
@@ -21,6 +21,33 @@ class PodcastMetaModel(BaseModel):
 class PodcastCheckModel(BaseModel):
     timestamp: int
     success: bool
+    failures: int = 0  # number of consecutive failed checks, up to this one
+
+
+class PodcastFeedValidatorsModel(BaseModel):
+    """Validators of the podcast feed (HTTP cache validators and content digest) from the last successful fetch."""
+
+    etag: str | None = None
+    last_modified: str | None = None
+    digest: str | None = None
+
+
+class PodcastWebSubModel(BaseModel):
+    """WebSub subscription to the podcast feed, which makes the hub push feed updates instead of them being polled."""
+
+    hub_url: str
+    topic_url: str
+    secret: str  # secret the hub signs pushed content with
+    requested_at: int  # timestamp of the last subscription request (0 if it has not been requested yet)
+    lease_expires_at: int | None = None  # None until the hub verifies the subscription
+
+
+class PodcastLeaseModel(BaseModel):
+    """Claim of the podcast by a feed poller replica, so that replicas don't check the same feeds."""
+
+    owner: str  # replica which has claimed the podcast
+    token: str  # identifies podcasts claimed at once
+    expires_at: int  # timestamp other replicas may claim the podcast after
 
 
 class PodcastDocument(Document):
@@ -29,13 +56,48 @@ class PodcastDocument(Document):
 
     meta: PodcastMetaModel
     check: PodcastCheckModel
+    feed_validators: PodcastFeedValidatorsModel = Field(default_factory=PodcastFeedValidatorsModel)
+    websub: PodcastWebSubModel | None = None
 
     latest_episode_publication_timestamp: int | None
+    publication_interval: int | None = None  # moving average of intervals between episodes (seconds)
+
+    next_check_at: Indexed(int) = 0  # timestamp the feed is due to be checked at
+    lease: PodcastLeaseModel | None = None  # None if the podcast is not being checked
+
+    # timestamp the podcast was found to have no followers at, None if it has some.
+    # feeds of dormant podcasts are not checked, and they're deleted after a while (see Compactor):
+    dormant_since: int | None = None
 
     class Settings:
         name = "podcasts"
+        # only changed fields are saved, as documents are updated concurrently (e.g. when WebSub hubs call back):
+        use_state_management = True
         indexes = [
             [
                 ("meta.title", pymongo.TEXT),
-            ]
+            ],
+            # podcasts due to be checked are looked for among podcasts which are not dormant:
+            [
+                ("dormant_since", pymongo.ASCENDING),
+                ("next_check_at", pymongo.ASCENDING),
+            ],
         ]
+
+
+class PodcastPollingModel(BaseModel):
+    """
+    Projection of PodcastDocument to the fields feed poller needs to check the podcast feed.
+    Fields of the document are updated with $set, as the projection can't be saved as a whole.
+    """
+
+    id: PydanticObjectId = Field(alias="_id")
+    feed_url: str
+
+    meta: PodcastMetaModel
+    check: PodcastCheckModel
+    feed_validators: PodcastFeedValidatorsModel = Field(default_factory=PodcastFeedValidatorsModel)
+    websub: PodcastWebSubModel | None = None
+
+    latest_episode_publication_timestamp: int | None
+    publication_interval: int | None = None
@@ -0,0 +1,11 @@
+from beanie import Document, Indexed, PydanticObjectId
+
+
+class PollRequestDocument(Document):
+    """Request to check feed of the podcast ahead of its schedule (e.g. when the podcast is just followed)."""
+
+    podcast_id: Indexed(PydanticObjectId, unique=True)  # pending requests to check a podcast are collapsed into one
+    requested_at: int
+
+    class Settings:
+        name = "poll_requests"
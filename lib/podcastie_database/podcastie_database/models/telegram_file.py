@@ -0,0 +1,16 @@
+import pymongo
+from beanie import Document, Indexed
+
+
+class TelegramFileDocument(Document):
+    """File uploaded to Telegram, so that it can be sent again by its file ID instead of being uploaded again."""
+
+    url: Indexed(str, unique=True)  # URL the file has been downloaded from
+    file_id: str
+    content_hash: str | None = None  # SHA-256 of the file content, None if the file has been uploaded unread
+
+    class Settings:
+        name = "telegram_files"
+        indexes = [
+            [("content_hash", pymongo.ASCENDING)],
+        ]
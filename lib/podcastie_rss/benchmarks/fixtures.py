@@ -0,0 +1,106 @@
+"""Synthetic podcast feeds of various sizes and encodings, modelled after feeds produced by popular hosting platforms."""
+
+import email.utils
+import typing
+from xml.sax.saxutils import escape
+
+SIZES = {
+    "small": 10,
+    "medium": 200,
+    "large": 2000,
+}  # number of episodes in a feed of each size
+
+# text used in titles and descriptions, so that it's representable in each encoding:
+ENCODINGS = {
+    "utf-8": "Подкаст über alles 🎧",
+    "utf-16": "Подкаст über alles 🎧",
+    "windows-1251": "Подкаст обо всём",
+    "iso-8859-1": "Émission über alles",
+}
+
+_FIRST_EPISODE_PUBLISHED = 1_500_000_000
+_EPISODE_INTERVAL = 7 * 24 * 60 * 60  # (seconds)
+
+
+def _rss_episode(number: int, text: str) -> str:
+    published = email.utils.formatdate(_FIRST_EPISODE_PUBLISHED + number * _EPISODE_INTERVAL)
+    notes = "".join(f"<li>{escape(text)}, topic {topic} &amp; more</li>" for topic in range(10))
+    return f"""
+    <item>
+      <title>{escape(text)} #{number}</title>
+      <link>https://example.com/episodes/{number}</link>
+      <guid isPermaLink="false">episode-{number}</guid>
+      <pubDate>{published}</pubDate>
+      <description><![CDATA[<p>{text}, episode {number}.</p><ul>{notes}</ul>]]></description>
+      <content:encoded><![CDATA[<p>{text}, episode {number}.</p><ul>{notes}</ul>]]></content:encoded>
+      <itunes:summary>{escape(text)}, episode {number}.</itunes:summary>
+      <itunes:duration>01:02:03</itunes:duration>
+      <itunes:explicit>no</itunes:explicit>
+      <itunes:episode>{number}</itunes:episode>
+      <itunes:episodeType>full</itunes:episodeType>
+      <itunes:image href="https://example.com/episodes/{number}.jpg"/>
+      <enclosure url="https://example.com/episodes/{number}.mp3" length="{50_000_000 + number}" type="audio/mpeg"/>
+    </item>"""
+
+
+def _atom_episode(number: int, text: str) -> str:
+    published = email.utils.formatdate(_FIRST_EPISODE_PUBLISHED + number * _EPISODE_INTERVAL)
+    return f"""
+  <entry>
+    <id>urn:example:episode-{number}</id>
+    <title>{escape(text)} #{number}</title>
+    <published>{published}</published>
+    <link rel="alternate" type="text/html" href="https://example.com/episodes/{number}"/>
+    <link rel="enclosure" type="audio/mpeg" length="{50_000_000 + number}"
+          href="https://example.com/episodes/{number}.mp3"/>
+    <content type="html">&lt;p&gt;{escape(text)}, episode {number}.&lt;/p&gt;</content>
+    <media:thumbnail url="https://example.com/episodes/{number}.jpg"/>
+  </entry>"""
+
+
+def rss_feed(episodes: int, encoding: str) -> bytes:
+    text = ENCODINGS[encoding]
+    items = "".join(_rss_episode(number, text) for number in reversed(range(episodes)))
+    feed = f"""<?xml version="1.0" encoding="{encoding}"?>
+<rss version="2.0"
+     xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"
+     xmlns:content="http://purl.org/rss/1.0/modules/content/"
+     xmlns:atom="http://www.w3.org/2005/Atom">
+  <channel>
+    <title>{escape(text)}</title>
+    <link>https://example.com</link>
+    <atom:link href="https://example.com/feed.xml" rel="self" type="application/rss+xml"/>
+    <description>{escape(text)}</description>
+    <language>ru</language>
+    <itunes:author>{escape(text)}</itunes:author>
+    <itunes:image href="https://example.com/cover.jpg"/>
+    <itunes:category text="Technology"><itunes:category text="Tech News"/></itunes:category>
+    <itunes:owner><itunes:name>Example</itunes:name><itunes:email>podcast@example.com</itunes:email></itunes:owner>
+    <image><url>https://example.com/cover.jpg</url><title>{escape(text)}</title></image>{items}
+  </channel>
+</rss>
+"""
+    return feed.encode(encoding)
+
+
+def atom_feed(episodes: int, encoding: str) -> bytes:
+    text = ENCODINGS[encoding]
+    entries = "".join(_atom_episode(number, text) for number in reversed(range(episodes)))
+    feed = f"""<?xml version="1.0" encoding="{encoding}"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:media="http://search.yahoo.com/mrss/">
+  <title>{escape(text)}</title>
+  <subtitle>{escape(text)}</subtitle>
+  <icon>https://example.com/cover.jpg</icon>
+  <link rel="alternate" type="text/html" href="https://example.com"/>{entries}
+</feed>
+"""
+    return feed.encode(encoding)
+
+
+def fixtures() -> typing.Iterator[tuple[str, bytes]]:
+    """Yields names and contents of all fixture feeds."""
+    for size, episodes in SIZES.items():
+        for encoding in ENCODINGS:
+            yield f"rss-{size}-{encoding}", rss_feed(episodes, encoding)
+
+        yield f"atom-{size}-utf-8", atom_feed(episodes, "utf-8")
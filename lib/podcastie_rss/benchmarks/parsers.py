@@ -0,0 +1,131 @@
+"""
+Benchmarks feed parser backends against fixture feeds (and optionally against real feeds saved to a directory).
+
+Reports parse time of the whole feed and of the latest episode only (as feeds are polled),
+and peak memory used to parse the whole feed, measured in a fresh process, so that memory allocated
+by libxml2 is accounted for too. Also checks that all backends produce the same output.
+
+Peak memory is measured using procfs, so the benchmark only runs on Linux.
+
+Usage: python benchmarks/parsers.py [--repeat N] [--feeds DIR]
+"""
+
+import argparse
+import multiprocessing
+import pathlib
+import statistics
+import sys
+import time
+import typing
+
+from fixtures import fixtures
+
+from podcastie_rss.feed import Feed, _parse_feed_content
+from podcastie_rss.parsers import FeedParser, LxmlFeedParser, PodcastparserFeedParser
+
+_FEED_URL = "https://example.com/feed.xml"
+
+# max number of episodes parsed in each mode (0 means the whole feed):
+_MODES = {
+    "whole": 0,
+    "latest": 1,
+}
+
+
+def _available_parsers() -> list[type[FeedParser]]:
+    parsers: list[type[FeedParser]] = [PodcastparserFeedParser]
+    if LxmlFeedParser is not None:
+        parsers.append(LxmlFeedParser)
+    else:
+        print("lxml is not installed, only podcastparser backend is benchmarked", file=sys.stderr)
+
+    return parsers
+
+
+def _parse(parser: type[FeedParser], content: bytes, max_episodes: int) -> Feed | str:
+    """Returns parsed feed or representation of the error, as feeds which fail to parse are benchmarked too."""
+    try:
+        return _parse_feed_content(parser, _FEED_URL, [content], max_episodes, since=None, complete=True)
+    except Exception as e:
+        return repr(e)
+
+
+def _parse_time(parser: type[FeedParser], content: bytes, max_episodes: int, repeat: int) -> float:
+    """Returns median parse time (seconds)."""
+    timings: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _parse(parser, content, max_episodes)
+        timings.append(time.perf_counter() - started)
+
+    return statistics.median(timings)
+
+
+def _rss(field: str) -> int:
+    """Returns field of /proc/self/status describing resident set size (bytes)."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) * 1024
+
+    raise LookupError(f"{field} is missing in /proc/self/status")
+
+
+def _measure_peak_memory(parser: type[FeedParser], content: bytes, connection: typing.Any) -> None:
+    # peak resident set size is reset, so that memory used before (e.g. to receive the content) is not counted:
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+
+    before = _rss("VmRSS")
+    _parse(parser, content, max_episodes=0)
+    connection.send(_rss("VmHWM") - before)
+
+
+def _peak_memory(parser: type[FeedParser], content: bytes) -> int:
+    """Returns growth of peak resident set size caused by parsing the whole feed in a fresh process (bytes)."""
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure_peak_memory, args=(parser, content, sender))
+    process.start()
+    peak_memory = receiver.recv()
+    process.join()
+
+    return peak_memory
+
+
+def _load_feeds(directory: pathlib.Path | None) -> list[tuple[str, bytes]]:
+    feeds = list(fixtures())
+    if directory is not None:
+        feeds += [(path.name, path.read_bytes()) for path in sorted(directory.iterdir()) if path.is_file()]
+
+    return feeds
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Benchmark feed parser backends.")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="number of runs parse time is the median of")
+    arg_parser.add_argument("--feeds", type=pathlib.Path, help="directory with real feeds to benchmark as well")
+    args = arg_parser.parse_args()
+
+    parsers = _available_parsers()
+    header = f"{'feed':<28} {'size':>9} {'backend':<24} " + " ".join(f"{mode + ' ms':>10}" for mode in _MODES)
+    print(f"{header} {'peak MiB':>9} {'output':>7}")
+
+    for name, content in _load_feeds(args.feeds):
+        outputs: list[Feed | str] = []
+        for parser in parsers:
+            outputs.append(_parse(parser, content, max_episodes=0))
+
+            timings = " ".join(
+                f"{_parse_time(parser, content, max_episodes, args.repeat) * 1000:>10.2f}"
+                for max_episodes in _MODES.values()
+            )
+            peak_memory = _peak_memory(parser, content) / 1024 / 1024
+            output = "same" if outputs[-1] == outputs[0] else "DIFFERS"
+            print(
+                f"{name:<28} {len(content) // 1024:>7}Ki {parser.__name__:<24} {timings} {peak_memory:>9.1f} {output:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
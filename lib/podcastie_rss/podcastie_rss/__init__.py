@@ -0,0 +1,18 @@
+from podcastie_rss.client import FeedClient
+from podcastie_rss.feed import (
+    AudioFile,
+    Episode,
+    Feed,
+    FeedError,
+    FeedNotModified,
+    FeedParseError,
+    FeedReadError,
+    FeedThrottledError,
+    FeedTooLargeError,
+    FeedValidateError,
+    FeedValidators,
+    WebSubLinks,
+    fetch_feed,
+    parse_feed,
+)
+from podcastie_rss.parsers import DEFAULT_FEED_PARSER, FeedParser, LxmlFeedParser, PodcastparserFeedParser
@@ -0,0 +1,139 @@
+import concurrent.futures
+
+import aiohttp
+
+from podcastie_rss.parsers import DEFAULT_FEED_PARSER, FeedParser
+from podcastie_rss.scheduler import HostScheduler
+
+_DEFAULT_USER_AGENT = "podcastie (+https://github.com/jieggii/podcastie)"
+
+_DEFAULT_LIMIT = 100  # max number of simultaneous connections
+_DEFAULT_LIMIT_PER_HOST = 8  # max number of simultaneous connections to a single host
+_DEFAULT_KEEPALIVE_TIMEOUT = 60  # how long idle connections are kept open (seconds)
+_DEFAULT_DNS_CACHE_TTL = 10 * 60  # how long resolved addresses are cached (seconds)
+
+_DEFAULT_CONNECT_TIMEOUT = 10  # timeout for acquiring a connection, including handshakes (seconds)
+_DEFAULT_READ_TIMEOUT = 30  # timeout between two reads of the response body (seconds)
+_DEFAULT_TOTAL_TIMEOUT = 2 * 60  # timeout for the whole request (seconds)
+
+# max number of feed bytes read before giving up, large enough for feeds with long back catalogues (bytes):
+_DEFAULT_MAX_BODY_SIZE = 64 * 1024 * 1024
+
+_DEFAULT_HOST_CONCURRENCY = 4  # max number of simultaneous requests to a single host
+_DEFAULT_HOST_REQUEST_INTERVAL = 0.25  # min interval between starts of requests to a single host (seconds)
+_DEFAULT_MAX_THROTTLE_WAIT = 30  # max time to wait for a host which asked to pause requests (seconds)
+
+
+class FeedClient:
+    """
+    Long-lived HTTP client used to fetch RSS feeds.
+
+    Owns a single aiohttp session, so TCP/TLS connections and DNS lookups are reused between fetches.
+    The session is created lazily and must be used and closed within the same event loop.
+
+    Feeds are parsed on the event loop, unless parse_executor is provided (e.g. a process pool),
+    in which case raw feed content is sent to it for parsing. The executor is not owned by the client.
+    Feeds are parsed by the parser backend provided, the lxml one by default (if lxml is installed).
+
+    Requests are scheduled per host (see HostScheduler), so that hosts serving many feeds are not overloaded.
+    If a host asks to pause requests for longer than max_throttle_wait, fetches fail right away instead of waiting.
+    """
+
+    _session: aiohttp.ClientSession | None
+
+    _limit: int
+    _limit_per_host: int
+    _keepalive_timeout: int
+    _dns_cache_ttl: int
+    _timeout: aiohttp.ClientTimeout
+    _user_agent: str
+    _max_body_size: int
+    _parse_executor: concurrent.futures.Executor | None
+    _parser: type[FeedParser]
+    _scheduler: HostScheduler
+    _max_throttle_wait: int
+
+    def __init__(
+        self,
+        limit: int = _DEFAULT_LIMIT,
+        limit_per_host: int = _DEFAULT_LIMIT_PER_HOST,
+        keepalive_timeout: int = _DEFAULT_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl: int = _DEFAULT_DNS_CACHE_TTL,
+        connect_timeout: int = _DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: int = _DEFAULT_READ_TIMEOUT,
+        total_timeout: int = _DEFAULT_TOTAL_TIMEOUT,
+        user_agent: str = _DEFAULT_USER_AGENT,
+        max_body_size: int = _DEFAULT_MAX_BODY_SIZE,
+        parse_executor: concurrent.futures.Executor | None = None,
+        parser: type[FeedParser] = DEFAULT_FEED_PARSER,
+        host_concurrency: int = _DEFAULT_HOST_CONCURRENCY,
+        host_request_interval: float = _DEFAULT_HOST_REQUEST_INTERVAL,
+        max_throttle_wait: int = _DEFAULT_MAX_THROTTLE_WAIT,
+    ):
+        self._session = None
+
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_cache_ttl = dns_cache_ttl
+        self._timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout, sock_read=read_timeout)
+        self._user_agent = user_agent
+        self._max_body_size = max_body_size
+        self._parse_executor = parse_executor
+        self._parser = parser
+        self._scheduler = HostScheduler(host_concurrency, host_request_interval)
+        self._max_throttle_wait = max_throttle_wait
+
+    @property
+    def max_body_size(self) -> int:
+        """Max number of bytes of a single feed read before the fetch is aborted."""
+        return self._max_body_size
+
+    @property
+    def parse_executor(self) -> concurrent.futures.Executor | None:
+        """Executor feeds are parsed in, None if they are parsed on the event loop."""
+        return self._parse_executor
+
+    @property
+    def parser(self) -> type[FeedParser]:
+        """Parser backend feeds are parsed by."""
+        return self._parser
+
+    @property
+    def scheduler(self) -> HostScheduler:
+        """Scheduler all requests are made through."""
+        return self._scheduler
+
+    @property
+    def max_throttle_wait(self) -> int:
+        """Max time to wait for a host which asked to pause requests (seconds)."""
+        return self._max_throttle_wait
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                keepalive_timeout=self._keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self._dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._timeout,
+                headers={"User-Agent": self._user_agent},
+            )
+
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> "FeedClient":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
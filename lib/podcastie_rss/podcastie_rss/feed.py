@@ -0,0 +1,595 @@
+import asyncio
+import concurrent.futures
+import datetime
+import email.utils
+import hashlib
+import re
+import typing
+from dataclasses import dataclass, field
+
+import aiohttp
+import podcastparser
+
+from podcastie_rss.client import FeedClient
+from podcastie_rss.parsers import FeedParser
+from podcastie_rss.scheduler import HostThrottledError
+
+_READ_CHUNK_SIZE = 64 * 1024  # size of chunks feed content is read by (bytes)
+
+# closing tag of an element containing a single episode (<item> in RSS, <entry> in Atom), possibly namespace-prefixed:
+_EPISODE_END_TAG_PATTERN = re.compile(rb"</(?:[A-Za-z_][\w.-]*:)?(?:item|entry)\s*>")
+_EPISODE_END_TAG_MAX_LEN = 64  # max length of the closing tag the scan accounts for (bytes)
+
+# statuses hosts respond with when they are overloaded, possibly asking to pause requests using Retry-After:
+_THROTTLING_STATUSES = {429, 503}
+_DEFAULT_RETRY_AFTER = 60  # pause of requests to a host responded with 429 without Retry-After (seconds)
+_MAX_RETRY_AFTER = 24 * 60 * 60  # max pause of requests to a host, whatever it asks for (seconds)
+
+# prefix of digests calculated over the whole feed rather than over its head:
+_WHOLE_FEED_DIGEST_PREFIX = "*"
+
+_SUPPORTED_ENCLOSURE_MIME_TYPES = {
+    "audio/mp3",
+    "audio/mpeg",
+}  # todo: expand to supported by Telegram as we don't need to compress audio anymore
+
+
+class FeedError(Exception):
+    pass
+
+
+class FeedReadError(FeedError):
+    pass
+
+
+class FeedTooLargeError(FeedReadError):
+    pass
+
+
+class FeedThrottledError(FeedReadError):
+    """Raised when the host of the feed asks to pause requests to it."""
+
+    retry_after: float  # time after which the feed may be requested again (seconds)
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class FeedParseError(FeedError):
+    pass
+
+
+class FeedValidateError(FeedError):
+    pass
+
+
+@dataclass
+class AudioFile:
+    url: str
+    size: int  # size in bytes
+
+
+@dataclass
+class Episode:
+    published: int
+
+    title: str | None
+    description: str | None
+    link: str | None
+    audio_file: AudioFile | None
+    art_url: str | None
+
+
+@dataclass
+class FeedValidators:
+    """
+    Validators of a feed, used to detect that it has not changed since the last fetch.
+
+    etag and last_modified are sent to the server to make conditional requests,
+    digest is a fingerprint of the feed content read, used when the server does not support them.
+    """
+
+    etag: str | None = None
+    last_modified: str | None = None
+    digest: str | None = None
+
+
+@dataclass
+class WebSubLinks:
+    """Links a feed delivered by a WebSub hub advertises, needed to subscribe to the feed."""
+
+    hub_url: str
+    topic_url: str  # URL the feed is published at, as the hub knows it
+
+
+@dataclass
+class Feed:
+    title: str
+
+    description: str | None
+    link: str | None
+    cover_url: str | None
+    episodes: list[Episode]  # in publication order, the latest episode is the last one
+
+    validators: FeedValidators = field(default_factory=FeedValidators)
+    websub: WebSubLinks | None = None  # None if the feed is not delivered by a WebSub hub
+
+    ttl: int | None = None  # time the feed may be cached for, according to its <ttl> (seconds)
+    max_age: int | None = None  # time the feed may be cached for, according to HTTP caching headers (seconds)
+
+    @property
+    def latest_episode(self) -> Episode | None:
+        return self.episodes[-1] if self.episodes else None
+
+
+@dataclass
+class FeedNotModified:
+    """Returned instead of a feed when it has not been modified since it was fetched last time."""
+
+    validators: FeedValidators
+    max_age: int | None = None  # time the feed may be cached for, according to HTTP caching headers (seconds)
+
+
+def _build_conditional_headers(validators: FeedValidators | None) -> dict[str, str]:
+    headers: dict[str, str] = {}
+    if validators:
+        if validators.etag:
+            headers[aiohttp.hdrs.IF_NONE_MATCH] = validators.etag
+        if validators.last_modified:
+            headers[aiohttp.hdrs.IF_MODIFIED_SINCE] = validators.last_modified
+
+    return headers
+
+
+def _read_validators(response: aiohttp.ClientResponse, fallback: FeedValidators | None = None) -> FeedValidators:
+    fallback = fallback or FeedValidators()
+    return FeedValidators(
+        etag=response.headers.get(aiohttp.hdrs.ETAG, fallback.etag),
+        last_modified=response.headers.get(aiohttp.hdrs.LAST_MODIFIED, fallback.last_modified),
+        digest=fallback.digest,
+    )
+
+
+def _seconds_until(http_date: str) -> float | None:
+    """Parses HTTP date. Returns seconds until it, 0 if it has passed."""
+    try:
+        date = email.utils.parsedate_to_datetime(http_date)
+    except (TypeError, ValueError):
+        return None
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.UTC)
+
+    return max(0.0, (date - datetime.datetime.now(datetime.UTC)).total_seconds())
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parses Retry-After header value, which is either a number of seconds or a date. Returns seconds."""
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    return _seconds_until(value)
+
+
+def _read_max_age(response: aiohttp.ClientResponse) -> int | None:
+    """Reads time the response may be cached for from Cache-Control or Expires headers. Returns seconds."""
+    directives: dict[str, str] = {}
+    for directive in response.headers.get(aiohttp.hdrs.CACHE_CONTROL, "").split(","):
+        name, _, value = directive.partition("=")
+        directives[name.strip().lower()] = value.strip().strip('"')
+
+    if "no-store" in directives or "no-cache" in directives:
+        return 0
+
+    # max-age takes precedence over Expires, time the response has spent in caches is subtracted from it:
+    max_age = directives.get("max-age")
+    if max_age is not None:
+        if not max_age.isdigit():
+            return 0
+
+        age = response.headers.get(aiohttp.hdrs.AGE, "").strip()
+        return max(0, int(max_age) - (int(age) if age.isdigit() else 0))
+
+    expires = response.headers.get(aiohttp.hdrs.EXPIRES)
+    if expires is None:
+        return None
+
+    # invalid dates (e.g. "0") mean that the response has already expired:
+    seconds = _seconds_until(expires)
+    return int(seconds) if seconds is not None else 0
+
+
+def _read_websub_links(
+    response: aiohttp.ClientResponse, url: str, fallback: WebSubLinks | None = None
+) -> WebSubLinks | None:
+    """Reads WebSub links from Link headers, which take precedence over links in the feed itself."""
+    hub = response.links.get("hub")
+    if hub is None:
+        return fallback
+
+    topic = response.links.get("self")
+    if topic is not None:
+        topic_url = str(topic["url"])
+    else:
+        topic_url = fallback.topic_url if fallback else url
+
+    return WebSubLinks(hub_url=str(hub["url"]), topic_url=topic_url)
+
+
+class _FeedContentReader:
+    """
+    Reads raw feed content episode by episode.
+
+    Episode boundaries are found by a cheap scan of raw bytes for closing tags, nothing is parsed at this point.
+    Content is kept as chunks it has been received in and is never joined, decoded or copied as a whole:
+    parsers are fed and digests are calculated chunk by chunk.
+    """
+
+    _response: aiohttp.ClientResponse
+    _max_body_size: int
+
+    _chunks: list[bytes]
+    _size: int  # number of bytes read so far
+    _tail: bytes  # end of the last chunk, scanned again with the beginning of the next one
+    _episode_ends: list[int]  # offsets right after closing tags of the episodes found so far
+    _complete: bool
+
+    def __init__(self, response: aiohttp.ClientResponse, max_body_size: int):
+        self._response = response
+        self._max_body_size = max_body_size
+
+        self._chunks = []
+        self._size = 0
+        self._tail = b""
+        self._episode_ends = []
+        self._complete = False
+
+    @property
+    def complete(self) -> bool:
+        """Whether the whole feed has been read."""
+        return self._complete
+
+    async def read(self, episodes: int) -> tuple[list[bytes], bool]:
+        """
+        Reads feed content until the specified number of episode elements have been closed (0 means the whole feed).
+
+        Returns chunks of content up to the end of the last of these episodes (the head) and whether it's the whole feed.
+        The head is always cut right after the closing tag, so that it does not depend on chunk boundaries.
+        """
+        while not self._complete and (not episodes or len(self._episode_ends) < episodes):
+            chunk = await self._response.content.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                self._complete = True
+                break
+
+            if self._size + len(chunk) > self._max_body_size:
+                raise FeedTooLargeError(f"feed exceeds body size limit of {self._max_body_size} bytes")
+
+            # closing tag may be split between two chunks, so the boundary between them is scanned too:
+            self._scan(self._tail + chunk[:_EPISODE_END_TAG_MAX_LEN], self._size - len(self._tail))
+            self._scan(chunk, self._size)
+
+            self._chunks.append(chunk)
+            self._size += len(chunk)
+            self._tail = (self._tail + chunk)[-_EPISODE_END_TAG_MAX_LEN:]
+
+        if episodes and len(self._episode_ends) >= episodes:
+            end = self._episode_ends[episodes - 1]
+            return self._head(end), self._complete and end == self._size
+
+        return list(self._chunks), True
+
+    def _scan(self, data: bytes, offset: int) -> None:
+        for match in _EPISODE_END_TAG_PATTERN.finditer(data):
+            end = offset + match.end()
+            # tags at chunk boundaries are found twice:
+            if not self._episode_ends or end > self._episode_ends[-1]:
+                self._episode_ends.append(end)
+
+    def _head(self, end: int) -> list[bytes]:
+        head: list[bytes] = []
+        offset = 0
+        for chunk in self._chunks:
+            if offset + len(chunk) >= end:
+                # only the last chunk of the head is copied, if it has to be cut:
+                head.append(chunk[: end - offset])
+                break
+
+            head.append(chunk)
+            offset += len(chunk)
+
+        return head
+
+
+def _digest(content: list[bytes], whole: bool) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    for chunk in content:
+        hasher.update(chunk)
+
+    digest = hasher.hexdigest()
+    return f"{_WHOLE_FEED_DIGEST_PREFIX}{digest}" if whole else digest
+
+
+def _build_episode(raw_episode: dict[str, typing.Any]) -> Episode | None:
+    """Builds episode from podcastparser output. Returns None if the episode does not contain publication date."""
+
+    # get publication date (it's required, episode will be omitted if it does not contain publication date):
+    published: int | None = raw_episode.get("published")
+    if not published:
+        return None
+
+    # parse episode title (it's optional) (should it be required?):
+    title: str | None = raw_episode.get("title")
+
+    # parse episode link (it's optional):
+    link: str | None = raw_episode.get("link")
+
+    # parse episode description (it's optional):
+    description: str | None = raw_episode.get("description")
+
+    # parse episode art URL (it's optional):
+    art_url: str | None = raw_episode.get("episode_art_url")
+
+    # parse episode audio file (it's optional):
+    audio_file: AudioFile | None = None
+    enclosures: list[dict[str, typing.Any]] | None = raw_episode.get("enclosures")
+    if enclosures:
+        enclosure = enclosures[0]  # use the first enclosure
+
+        # parse file URL (it's required):
+        file_url: str | None = enclosure.get("url")
+
+        # parse file size (it's required):
+        file_size: int | None = enclosure.get("file_size")
+
+        # parse file mime type (it's required):
+        file_mime_type: str | None = enclosure.get("mime_type")
+
+        if file_url and file_size and (file_mime_type in _SUPPORTED_ENCLOSURE_MIME_TYPES):
+            audio_file = AudioFile(url=file_url, size=file_size)
+
+    return Episode(
+        published=published,
+        title=title,
+        description=description,
+        link=link,
+        art_url=art_url,
+        audio_file=audio_file,
+    )
+
+
+def _build_feed(raw_feed: dict[str, typing.Any], url: str) -> Feed:
+    """Builds feed from podcastparser output."""
+
+    # parse and validate title (it's required):
+    title: str | None = raw_feed.get("title")
+    if not title:
+        raise FeedValidateError("feed does not contain title")
+
+    # parse podcast description (it's optional):
+    description: str | None = raw_feed.get(
+        "description"
+    )  # todo: check if there are any other fields containing description
+
+    # parse podcast link (it's optional):
+    link: str | None = raw_feed.get("link")
+
+    # parse podcast cover URL (it's optional)
+    cover_url: str | None = raw_feed.get("cover_url")
+
+    # parse WebSub links (they're optional), the feed URL is the topic unless the feed specifies it:
+    websub: WebSubLinks | None = None
+    hub_url: str | None = raw_feed.get("websub_hub")
+    if hub_url:
+        websub = WebSubLinks(hub_url=hub_url, topic_url=raw_feed.get("websub_topic") or url)
+
+    # parse time the feed may be cached for (it's optional):
+    ttl: int | None = raw_feed.get("ttl")
+    if ttl is not None:
+        ttl *= 60
+
+    # parse podcast episodes, ordered by publication date:
+    episodes: list[Episode] = []
+    for raw_episode in reversed(raw_feed.get("episodes") or []):
+        episode = _build_episode(raw_episode)
+        if episode:
+            episodes.append(episode)
+
+    return Feed(
+        title=title,
+        description=description,
+        link=link,
+        cover_url=cover_url,
+        episodes=episodes,
+        websub=websub,
+        ttl=ttl,
+    )
+
+
+def _parse_feed_content(
+    parser_class: type[FeedParser], url: str, content: list[bytes], max_episodes: int, since: int | None, complete: bool
+) -> Feed | None:
+    """
+    Parses raw feed content, fed to the parser chunk by chunk as it has been received.
+    It's never decoded beforehand, as the parser detects encoding declared by the feed itself.
+
+    Returns None if the content is not complete and does not contain enough episodes yet.
+    This function is run in executor worker processes, so it only takes and returns picklable objects.
+    """
+    parser = parser_class(url, max_episodes, since)
+    try:
+        for chunk in content:
+            if parser.feed(chunk):
+                break
+
+        if not parser.done and not complete:
+            return None
+
+        raw_feed = parser.close()
+    except podcastparser.FeedParseError as e:
+        # podcastparser exceptions can't be pickled, that's why the message is copied instead of chaining:
+        raise FeedParseError(f"failed to parse feed: {e.getMessage()}")
+
+    return _build_feed(raw_feed, url)
+
+
+async def _parse(
+    executor: concurrent.futures.Executor | None,
+    parser_class: type[FeedParser],
+    url: str,
+    content: list[bytes],
+    max_episodes: int,
+    since: int | None,
+    complete: bool,
+) -> Feed | None:
+    if executor is None:
+        return _parse_feed_content(parser_class, url, content, max_episodes, since, complete)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, _parse_feed_content, parser_class, url, content, max_episodes, since, complete
+    )
+
+
+async def _read_feed(
+    response: aiohttp.ClientResponse,
+    url: str,
+    *,
+    max_episodes: int,
+    since: int | None,
+    max_body_size: int,
+    digest: str | None,
+    parse_executor: concurrent.futures.Executor | None,
+    parser_class: type[FeedParser],
+) -> tuple[Feed | None, str]:
+    """
+    Reads and parses feed content until enough episodes have been read.
+
+    Returns parsed feed (or None if digest of the content read matches the provided one) and the digest.
+    """
+    reader = _FeedContentReader(response, max_body_size)
+
+    # the digest is calculated over the head containing the latest episode only, so that it does not depend
+    # on how many episodes are requested. Unless the whole feed had to be parsed last time
+    # (e.g. because its episodes are not listed newest first), then it's calculated over the whole feed:
+    whole = digest is not None and digest.startswith(_WHOLE_FEED_DIGEST_PREFIX)
+    head, complete = await reader.read(episodes=0 if whole else 1)
+
+    # skip parsing if the content has not changed since the last fetch:
+    head_digest = _digest(head, complete)
+    if head_digest == digest:
+        if not reader.complete:
+            response.close()
+        return None, head_digest
+
+    # one more episode is read, as the parser needs it to make sure episodes are listed newest first:
+    episodes = (max_episodes or 1) + 1
+    while True:
+        head, complete = await reader.read(episodes)
+
+        feed = await _parse(parse_executor, parser_class, url, head, max_episodes, since, complete)
+        if feed is not None:
+            break
+
+        # the head does not contain enough episodes: either there are more new episodes than expected,
+        # or the scan was wrong about episode boundaries (e.g. because of closing tags inside CDATA
+        # or episodes dropped as invalid), so twice as many episodes are read and parsed again:
+        episodes *= 2
+
+    if complete:
+        head_digest = _digest(head, True)
+
+    if not reader.complete:
+        # the rest of the feed is not needed, so the connection is closed instead of reading it till the end:
+        response.close()
+
+    return feed, head_digest
+
+
+async def _fetch_feed(
+    client: FeedClient, url: str, *, validators: FeedValidators | None, max_episodes: int, since: int | None
+) -> Feed | FeedNotModified:
+    try:
+        # hosts which asked to pause requests for long are not waited for, the feed will be fetched next time:
+        async with (
+            client.scheduler.slot(url, client.max_throttle_wait),
+            client.session.get(url, headers=_build_conditional_headers(validators)) as response,
+        ):
+            if response.status in _THROTTLING_STATUSES:
+                retry_after = _parse_retry_after(response.headers.get(aiohttp.hdrs.RETRY_AFTER))
+                if retry_after is None and response.status == 429:
+                    retry_after = _DEFAULT_RETRY_AFTER
+
+                # 503 without Retry-After is treated as an ordinary server error:
+                if retry_after is not None:
+                    retry_after = min(retry_after, _MAX_RETRY_AFTER)
+                    client.scheduler.throttle(url, retry_after)
+                    raise FeedThrottledError(f"feed host responded with {response.status}", retry_after)
+
+            if response.status == 304:
+                # 304 response may carry updated validators, otherwise the old ones remain valid:
+                return FeedNotModified(
+                    validators=_read_validators(response, fallback=validators), max_age=_read_max_age(response)
+                )
+
+            response.raise_for_status()
+            response_validators = _read_validators(response)
+
+            feed, response_validators.digest = await _read_feed(
+                response,
+                url,
+                max_episodes=max_episodes,
+                since=since,
+                max_body_size=client.max_body_size,
+                digest=validators.digest if validators else None,
+                parse_executor=client.parse_executor,
+                parser_class=client.parser,
+            )
+            if feed is None:
+                return FeedNotModified(validators=response_validators, max_age=_read_max_age(response))
+
+            feed.validators = response_validators
+            feed.websub = _read_websub_links(response, url, fallback=feed.websub)
+            feed.max_age = _read_max_age(response)
+            return feed
+
+    except HostThrottledError as e:
+        raise FeedThrottledError(
+            f"feed host asked to pause requests for {e.throttled_for:.0f}s more", e.throttled_for
+        ) from e
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        raise FeedReadError("failed to read feed") from e
+
+
+async def fetch_feed(
+    client: FeedClient, url: str, validators: FeedValidators | None = None, since: int | None = None
+) -> Feed | FeedNotModified:
+    """
+    Fetches feed by RSS feed URL using the provided client.
+
+    By default, only the latest episode is returned. If since (publication timestamp of the last known episode)
+    is provided, all episodes published after it are returned, and parsing stops at the first older one.
+
+    If validators from the previous fetch are provided, the request is made conditional
+    and FeedNotModified is returned when the feed has not changed since then
+    (either according to the server or to the digest of its content).
+    """
+    max_episodes = 1 if since is None else 0
+    return await _fetch_feed(client, url, validators=validators, max_episodes=max_episodes, since=since)
+
+
+async def parse_feed(client: FeedClient, url: str, content: bytes, since: int | None = None) -> Feed:
+    """
+    Parses feed content received by other means than fetching the feed (e.g. pushed by a WebSub hub)
+    the same way fetch_feed does, using the parser and the executor of the provided client.
+
+    By default, only the latest episode is returned. If since is provided, all episodes published after it are returned.
+    """
+    max_episodes = 1 if since is None else 0
+    feed = await _parse(client.parse_executor, client.parser, url, [content], max_episodes, since, complete=True)
+    return typing.cast(Feed, feed)  # complete content is always parsed
@@ -0,0 +1,10 @@
+from podcastie_rss.parsers.base import FeedParser
+from podcastie_rss.parsers.podcastparser_backend import PodcastparserFeedParser
+
+try:
+    from podcastie_rss.parsers.lxml_backend import LxmlFeedParser
+except ImportError:  # lxml is an optional dependency
+    LxmlFeedParser = None
+
+# parser backend used unless another one is requested, the fastest one available:
+DEFAULT_FEED_PARSER: type[FeedParser] = LxmlFeedParser or PodcastparserFeedParser
@@ -0,0 +1,158 @@
+import abc
+import contextlib
+import typing
+import urllib.parse
+from xml.sax import xmlreader
+
+import podcastparser
+
+
+class _WebSubLink(podcastparser.Target):
+    """Rule for feed links, which records links to the WebSub hub and to the feed itself (the topic)."""
+
+    def start(self, handler: podcastparser.PodcastHandler, attrs: typing.Mapping[str, str]) -> None:
+        href = attrs.get("href")
+        if not href:
+            return
+
+        url = urllib.parse.urljoin(handler.base, href.strip())
+        rel = attrs.get("rel")
+        # the first link of each kind is used, as feeds may list several hubs:
+        if rel == "hub" and not handler.get_podcast_attr("websub_hub"):
+            handler.set_podcast_attr("websub_hub", url)
+        elif rel == "self" and not handler.get_podcast_attr("websub_topic"):
+            handler.set_podcast_attr("websub_topic", url)
+
+
+def _parse_ttl(text: str) -> int | None:
+    """Parses RSS <ttl> value, which is a number of minutes."""
+    text = text.strip()
+    return int(text) if text.isdigit() else None
+
+
+# podcastparser rules for elements podcastparser ignores. Backends apply them in addition to podcastparser rules:
+# when an element starts, after the podcastparser rule for it, and when it ends, before the podcastparser rule:
+EXTRA_MAPPING: dict[str, podcastparser.Target] = {
+    "rss/channel/atom:link": _WebSubLink(),
+    "atom:feed/atom:link": _WebSubLink(),
+    "rss/channel/ttl": podcastparser.PodcastAttr("ttl", _parse_ttl),
+}
+
+
+@contextlib.contextmanager
+def _parse_errors() -> typing.Iterator[None]:
+    """Converts errors podcastparser rules raise on unexpected content to FeedParseError, as SAX errors are."""
+    try:
+        yield
+    except podcastparser.FeedParseError:
+        raise
+    except Exception as e:
+        raise podcastparser.FeedParseError(f"{e.__class__.__name__}: {e}", e, xmlreader.Locator()) from e
+
+
+class FeedParser(abc.ABC):
+    """
+    Parses RSS feed fed chunk by chunk into the podcastparser format.
+
+    Parsing is stopped as soon as max_episodes episodes have been read (0 means no limit)
+    or, if since is provided, as soon as an episode published at or before it has been reached,
+    so that the rest of the feed does not have to be downloaded at all.
+    Only episodes published after since are returned in this case.
+
+    Stopping early is only correct if episodes are listed newest first, as virtually all podcast feeds do.
+    That's why parsing is never stopped before two consecutive episodes confirmed this order,
+    and the whole feed is parsed if any two of them turn out to be in the opposite order.
+
+    Backends implement _feed and _close and report every episode they read with _episode_read,
+    they must produce the same output for the same content.
+    """
+
+    _url: str
+    _max_episodes: int
+    _since: int | None
+    _done: bool
+
+    _episodes_read: int  # number of valid episodes read so far
+    _last_published: int | None  # publication timestamp of the last episode read
+    _newest_first: bool  # whether episodes were confirmed to be listed newest first
+    _unordered: bool  # whether episodes were found not to be listed newest first
+
+    def __init__(self, url: str, max_episodes: int, since: int | None = None):
+        self._url = url
+        self._max_episodes = max_episodes
+        self._since = since
+        self._done = False
+
+        self._episodes_read = 0
+        self._last_published = None
+        self._newest_first = False
+        self._unordered = False
+
+    @property
+    def done(self) -> bool:
+        """Whether enough episodes have been read and no more data is needed."""
+        return self._done
+
+    def feed(self, data: bytes) -> bool:
+        """
+        Feeds a chunk of raw feed content to the parser. Returns True when no more data is needed.
+        Raises podcastparser.FeedParseError if the content is not a valid feed.
+        """
+        if not self._done:
+            with _parse_errors():
+                self._done = self._feed(data)
+
+        return self._done
+
+    def close(self) -> dict[str, typing.Any]:
+        """
+        Finishes parsing and returns parsed feed in the podcastparser format.
+        Raises podcastparser.FeedParseError if the content is not a valid feed.
+        """
+        with _parse_errors():
+            data = self._close()
+        self._done = True
+
+        episodes = data["episodes"]
+        if self._since is not None:
+            episodes = [episode for episode in episodes if episode["published"] > self._since]
+
+        # unlike podcastparser, episodes of serial podcasts are ordered newest first too,
+        # as it's the latest episodes that are needed:
+        episodes.sort(key=lambda episode: episode["published"], reverse=True)
+        if self._max_episodes:
+            episodes = episodes[: self._max_episodes]
+
+        data["episodes"] = episodes
+        return data
+
+    def _episode_read(self, published: int) -> bool:
+        """Must be called by backends for every valid episode read. Returns True when parsing should be stopped."""
+        self._episodes_read += 1
+
+        # episodes without publication date (0) are ignored, as they are omitted anyway:
+        if not published:
+            return False
+
+        if self._last_published is not None:
+            if published > self._last_published:
+                self._unordered = True
+            else:
+                self._newest_first = True
+        self._last_published = published
+
+        if self._unordered or not self._newest_first:
+            return False
+
+        if self._max_episodes and self._episodes_read > self._max_episodes:
+            return True
+
+        return self._since is not None and published <= self._since
+
+    @abc.abstractmethod
+    def _feed(self, data: bytes) -> bool:
+        """Parses a chunk of raw feed content. Returns True if parsing has been stopped."""
+
+    @abc.abstractmethod
+    def _close(self) -> dict[str, typing.Any]:
+        """Finishes parsing (unless it has been stopped) and returns parsed feed as podcastparser does."""
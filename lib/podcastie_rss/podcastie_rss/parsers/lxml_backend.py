@@ -0,0 +1,277 @@
+import typing
+
+import podcastparser
+from lxml import etree
+
+from podcastie_rss.parsers.base import EXTRA_MAPPING, FeedParser
+from podcastie_rss.parsers.podcastparser_backend import PodcastparserFeedParser
+
+_FEED_CHUNK_SIZE = 16 * 1024  # size of chunks content is fed to libxml2 by, so that it can be stopped early (bytes)
+
+_XML_BASE_ATTRIBUTE = "{http://www.w3.org/XML/1998/namespace}base"
+
+# paths of elements containing a single episode, as podcastparser builds them:
+_EPISODE_PATHS = {
+    "rss/channel/item",
+    "atom:feed/atom:entry",
+}
+
+# podcastparser rules for elements Feed and Episode are built from, other elements are skipped.
+# None of the rules for elements with children expects text, so text is only read from leaf elements:
+_MAPPING = {
+    path: podcastparser.MAPPING[path]
+    for path in (
+        "rss",
+        "rss/channel/title",
+        "rss/channel/link",
+        "rss/channel/description",
+        "rss/channel/itunes:summary",
+        "rss/channel/image/url",
+        "rss/channel/itunes:image",
+        "rss/channel/atom:link",
+        "rss/channel/item",
+        "rss/channel/item/guid",
+        "rss/channel/item/title",
+        "rss/channel/item/link",
+        "rss/channel/item/description",
+        "rss/channel/item/itunes:summary",
+        "rss/channel/item/media:description",
+        "rss/channel/item/content:encoded",
+        "rss/channel/item/pubDate",
+        "rss/channel/item/atom:link",
+        "rss/channel/item/itunes:image",
+        "rss/channel/item/media:thumbnail",
+        "rss/channel/item/media:group/media:thumbnail",
+        "rss/channel/item/media:content",
+        "rss/channel/item/media:group/media:content",
+        "rss/channel/item/enclosure",
+        "atom:feed/atom:title",
+        "atom:feed/atom:subtitle",
+        "atom:feed/atom:icon",
+        "atom:feed/atom:link",
+        "atom:feed/atom:entry",
+        "atom:feed/atom:entry/atom:id",
+        "atom:feed/atom:entry/atom:title",
+        "atom:feed/atom:entry/atom:link",
+        "atom:feed/atom:entry/atom:content",
+        "atom:feed/atom:entry/content:encoded",
+        "atom:feed/atom:entry/atom:published",
+        "atom:feed/atom:entry/atom:updated",
+        "atom:feed/atom:entry/media:group/media:description",
+        "atom:feed/atom:entry/media:thumbnail",
+        "atom:feed/atom:entry/media:group/media:thumbnail",
+    )
+}
+
+
+def _lxml_tags(name: str) -> list[str]:
+    """Returns all tags lxml may report for an element podcastparser names so (see podcastparser.Namespace.map)."""
+    if ":" not in name:
+        return [name]
+
+    prefix, local_name = name.split(":", 1)
+    return [
+        # element with undeclared prefix is named as is by both parsers:
+        name,
+        *(
+            f"{{{uri}}}{local_name}"
+            for uri, known_prefix in podcastparser.Namespace.NAMESPACES.items()
+            if known_prefix == prefix
+        ),
+    ]
+
+
+def _build_children() -> dict[str, dict[str, str]]:
+    children: dict[str, dict[str, str]] = {}
+    for path in _MAPPING.keys() | EXTRA_MAPPING.keys():
+        names = path.split("/")
+        for depth in range(1, len(names)):
+            parent_path, child_path = "/".join(names[:depth]), "/".join(names[: depth + 1])
+            for tag in _lxml_tags(names[depth]):
+                children.setdefault(parent_path, {})[tag] = child_path
+
+    return children
+
+
+# paths of walked elements mapped to lxml tags of their walked children and paths of these children:
+_CHILDREN = _build_children()
+
+# lxml tags of root elements mapped to their paths:
+_ROOTS = {tag: root for root in podcastparser.VALID_ROOTS for tag in _lxml_tags(root)}
+
+# tags of elements containing a single episode, as lxml names them:
+_EPISODE_TAGS = [tag for path in _EPISODE_PATHS for tag in _lxml_tags(path.rsplit("/", 1)[-1])]
+
+
+class _UnsupportedFeed(Exception):
+    pass
+
+
+def _element_path(element: etree._Element) -> str | None:
+    """Returns path of the element as podcastparser builds it, None if it's not a walked element."""
+    parent = element.getparent()
+    if parent is None:
+        return _ROOTS.get(element.tag)
+
+    parent_path = _element_path(parent)
+    if parent_path is None:
+        return None
+
+    return _CHILDREN.get(parent_path, {}).get(element.tag)
+
+
+class LxmlFeedParser(FeedParser):
+    """
+    Parser backend based on the libxml2 pull parser of lxml.
+
+    Only episode elements are reported by the pull parser. Each of them is handled by podcastparser rules
+    as soon as it's complete and is removed from the tree right after, elements of the feed itself
+    are handled when parsing is finished. Only rules for elements Feed and Episode are built from are applied
+    (along with rules of EXTRA_MAPPING), in the same order, so the result is the same as podcastparser's,
+    but most elements are not even looked at.
+
+    If lxml rejects the content (e.g. because of undeclared namespace prefixes, which expat tolerates),
+    it's parsed by PodcastparserFeedParser instead, so that both backends accept the same feeds.
+    """
+
+    _parser: etree.XMLPullParser
+    _handler: podcastparser.PodcastHandler
+    _chunks: list[bytes]  # content fed so far, replayed to the fallback parser
+    _started: bool  # whether the root element has been handled
+    _stopped_at: etree._Element | None  # episode element parsing has been stopped at
+    _fallback: PodcastparserFeedParser | None
+
+    def __init__(self, url: str, max_episodes: int, since: int | None = None):
+        super().__init__(url, max_episodes, since)
+        self._parser = etree.XMLPullParser(
+            events=("end",),
+            tag=_EPISODE_TAGS,
+            resolve_entities="internal",
+            no_network=True,
+            remove_comments=True,
+            remove_pis=True,
+        )
+        # podcastparser handler is only used to store parsed data and to run podcastparser rules against it:
+        self._handler = podcastparser.PodcastHandler(url, max_episodes=0)
+        self._chunks = []
+        self._started = False
+        self._stopped_at = None
+        self._fallback = None
+
+    def _feed(self, data: bytes) -> bool:
+        if self._fallback is not None:
+            return self._fallback.feed(data)
+
+        self._chunks.append(data)
+        try:
+            for offset in range(0, len(data), _FEED_CHUNK_SIZE):
+                self._parser.feed(data[offset : offset + _FEED_CHUNK_SIZE])
+                if self._read_episodes():
+                    return True
+        except (etree.XMLSyntaxError, _UnsupportedFeed):
+            return self._fall_back()
+
+        return False
+
+    def _close(self) -> dict[str, typing.Any]:
+        if self._fallback is None:
+            try:
+                if self._stopped_at is not None:
+                    root = self._stopped_at.getroottree().getroot()
+                else:
+                    root = self._parser.close()
+                    self._read_episodes()
+
+                return self._finish(root)
+            except (etree.XMLSyntaxError, _UnsupportedFeed):
+                self._fall_back()
+
+        return self._fallback._close()
+
+    def _fall_back(self) -> bool:
+        self._fallback = PodcastparserFeedParser(self._url, self._max_episodes, self._since)
+        for chunk in self._chunks:
+            if self._fallback.feed(chunk):
+                break
+
+        self._chunks = []
+        return self._fallback.done
+
+    def _read_episodes(self) -> bool:
+        for _, element in self._parser.read_events():
+            path = _element_path(element)
+            if path not in _EPISODE_PATHS:
+                continue
+
+            if not self._started:
+                self._start(element.getroottree().getroot())
+
+            episodes = len(self._handler.episodes)
+            self._walk(element, path)
+
+            # invalid episodes are dropped by podcastparser rules when their element ends:
+            if len(self._handler.episodes) > episodes and self._episode_read(self._handler.episodes[-1]["published"]):
+                self._stopped_at = element
+                return True
+
+            # episode has been handled, so it's removed to keep only one of them in memory at a time:
+            element.getparent().remove(element)
+
+        return False
+
+    def _start(self, root: etree._Element) -> None:
+        path = _ROOTS.get(root.tag)
+        if path is None:
+            raise _UnsupportedFeed()
+
+        target = _MAPPING.get(path)
+        if target is not None:
+            attrs = {("xml:base" if key == _XML_BASE_ATTRIBUTE else key): value for key, value in root.attrib.items()}
+            target.start(self._handler, attrs)
+
+        self._started = True
+
+    def _finish(self, root: etree._Element) -> dict[str, typing.Any]:
+        if not self._started:
+            self._start(root)
+
+        # walk stops at the episode parsing has been stopped at, as all other episodes have been removed:
+        self._walk_children(root, _ROOTS[root.tag])
+        return self._handler.data
+
+    def _walk(self, element: etree._Element, path: str) -> bool:
+        """Applies podcastparser rules to the element and its descendants. Returns True if an episode was reached."""
+        target, extra_target = _MAPPING.get(path), EXTRA_MAPPING.get(path)
+        if target is not None:
+            target.start(self._handler, element.attrib)
+        if extra_target is not None:
+            extra_target.start(self._handler, element.attrib)
+
+        if self._walk_children(element, path):
+            return True
+
+        text = ""
+        if (target is not None and target.WANT_TEXT) or (extra_target is not None and extra_target.WANT_TEXT):
+            text = "".join(element.itertext()) if len(element) else element.text or ""
+
+        if extra_target is not None:
+            extra_target.end(self._handler, text if extra_target.WANT_TEXT else "")
+        if target is not None:
+            target.end(self._handler, text if target.WANT_TEXT else "")
+
+        return False
+
+    def _walk_children(self, element: etree._Element, path: str) -> bool:
+        children = _CHILDREN.get(path)
+        if not children:
+            return False
+
+        for child in element:
+            child_path = children.get(child.tag)
+            if child_path is None:
+                continue
+
+            if child_path in _EPISODE_PATHS or self._walk(child, child_path):
+                return True
+
+        return False
@@ -0,0 +1,96 @@
+import typing
+from xml import sax
+from xml.sax import expatreader
+
+import podcastparser
+
+from podcastie_rss.parsers.base import EXTRA_MAPPING, FeedParser
+
+# paths of elements containing a single episode, as podcastparser builds them:
+_EPISODE_PATHS = {
+    "rss/channel/item",
+    "atom:feed/atom:entry",
+}
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _PodcastHandler(podcastparser.PodcastHandler):
+    """
+    podcastparser handler which reports every valid episode read and stops parsing when asked to.
+    It also applies rules of EXTRA_MAPPING.
+    """
+
+    _on_episode: typing.Callable[[int], bool]
+
+    def __init__(self, url: str, on_episode: typing.Callable[[int], bool]):
+        # episodes are truncated by the parser, podcastparser should not do it on its own:
+        super().__init__(url, max_episodes=0)
+        self._on_episode = on_episode
+
+    def startElement(self, name: str, attrs: typing.Mapping[str, str]) -> None:
+        super().startElement(name, attrs)
+
+        target = EXTRA_MAPPING.get("/".join(self.path_stack))
+        if target is not None:
+            target.start(self, attrs)
+            if target.WANT_TEXT:
+                self.text = []
+
+    def endElement(self, name: str) -> None:
+        path = "/".join(self.path_stack)
+        episodes = len(self.episodes)
+
+        target = EXTRA_MAPPING.get(path)
+        if target is not None:
+            target.end(self, "".join(self.text) if target.WANT_TEXT and self.text is not None else "")
+
+        super().endElement(name)
+        if target is not None:
+            self.text = None
+
+        # invalid episodes are dropped by podcastparser when their element ends:
+        if path not in _EPISODE_PATHS or len(self.episodes) != episodes:
+            return
+
+        if self._on_episode(self.episodes[-1]["published"]):
+            raise _StopParsing()
+
+
+class PodcastparserFeedParser(FeedParser):
+    """Pure Python parser backend, based on podcastparser and the SAX parser of the standard library."""
+
+    _handler: _PodcastHandler
+    _parser: expatreader.ExpatParser
+
+    def __init__(self, url: str, max_episodes: int, since: int | None = None):
+        super().__init__(url, max_episodes, since)
+        self._handler = _PodcastHandler(url, self._episode_read)
+        self._parser = expatreader.create_parser()
+        self._parser.setContentHandler(self._handler)
+        # the handler is only given a locator by parse(), not by feed(), but podcastparser reports errors with it
+        # (e.g. when the content is not a feed):
+        self._handler.setDocumentLocator(expatreader.ExpatLocator(self._parser))
+
+    def _feed(self, data: bytes) -> bool:
+        try:
+            self._parser.feed(data)
+        except _StopParsing:
+            return True
+        except sax.SAXParseException as e:
+            raise podcastparser.FeedParseError(e.getMessage(), e.getException(), e._locator)
+
+        return False
+
+    def _close(self) -> dict[str, typing.Any]:
+        if not self._done:
+            try:
+                self._parser.close()
+            except _StopParsing:
+                pass
+            except sax.SAXParseException as e:
+                raise podcastparser.FeedParseError(e.getMessage(), e.getException(), e._locator)
+
+        return self._handler.data
@@ -0,0 +1,96 @@
+import asyncio
+import contextlib
+import typing
+import urllib.parse
+from dataclasses import dataclass
+
+
+class HostThrottledError(Exception):
+    """Raised when the host asked to pause requests to it for longer than the request may wait."""
+
+    throttled_for: float  # for how long requests to the host are paused (seconds)
+
+    def __init__(self, throttled_for: float):
+        super().__init__(f"host asked to pause requests for {throttled_for:.0f}s more")
+        self.throttled_for = throttled_for
+
+
+@dataclass
+class _HostState:
+    semaphore: asyncio.Semaphore  # limits number of simultaneous requests to the host
+    next_start: float  # loop time the next request to the host may be started at
+    throttled_until: float  # loop time the host asked not to be requested until
+
+
+class HostScheduler:
+    """
+    Schedules requests so that no single host is overloaded, while requests to different hosts are not delayed.
+
+    At most concurrency requests to the same host are made at a time, and their starts are spaced
+    by at least interval seconds. A host may ask to pause requests to it for a while (see throttle),
+    then requests to it are delayed until then, unless the pause is longer than they may wait.
+
+    Hosts are told apart by host names, as most feeds of big podcast hosting platforms share one.
+    """
+
+    _concurrency: int
+    _interval: float
+    _hosts: dict[str, _HostState]
+
+    def __init__(self, concurrency: int, interval: float):
+        self._concurrency = concurrency
+        self._interval = interval
+        self._hosts = {}
+
+    def _host_state(self, url: str) -> _HostState:
+        host = urllib.parse.urlsplit(url).hostname or ""
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(semaphore=asyncio.Semaphore(self._concurrency), next_start=0, throttled_until=0)
+            self._hosts[host] = state
+
+        return state
+
+    def throttle(self, url: str, delay: float) -> None:
+        """Pauses requests to the host of the URL for delay seconds (e.g. when it responds with Retry-After)."""
+        state = self._host_state(url)
+        throttled_until = asyncio.get_running_loop().time() + delay
+        state.throttled_until = max(state.throttled_until, throttled_until)
+        state.next_start = max(state.next_start, state.throttled_until)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url: str, max_throttle_wait: float | None = None) -> typing.AsyncIterator[None]:
+        """
+        Waits until a request to the host of the URL can be made and holds the slot while it's being made.
+        Raises HostThrottledError if the host asked to pause requests for longer than max_throttle_wait,
+        either before the slot is taken or while it's being waited for.
+        """
+        state = self._host_state(url)
+        loop = asyncio.get_running_loop()
+
+        def check_throttle() -> None:
+            throttled_for = state.throttled_until - loop.time()
+            if max_throttle_wait is not None and throttled_for > max_throttle_wait:
+                raise HostThrottledError(throttled_for)
+
+        # requests are not queued for hosts which asked to pause for long:
+        check_throttle()
+
+        async with state.semaphore:
+            while True:
+                # the host may have been throttled while the request was queued or sleeping,
+                # then it fails instead of sleeping through the pause:
+                check_throttle()
+
+                # start time is reserved before sleeping, so that requests waiting at once are spaced too:
+                now = loop.time()
+                start = max(now, state.next_start)
+                state.next_start = start + self._interval
+                if start > now:
+                    await asyncio.sleep(start - now)
+
+                # the host may have been throttled while sleeping, then the start time is reserved again:
+                if loop.time() >= state.throttled_until:
+                    break
+
+            yield
@@ -0,0 +1,105 @@
+import asyncio
+import concurrent.futures
+
+import pytest
+from aiohttp import web
+
+import podcastie_rss
+from podcastie_rss.parsers import FeedParser, LxmlFeedParser, PodcastparserFeedParser
+
+_FEED_URL = "https://example.com/feed.xml"
+
+# content served at a feed URL which is not a feed (e.g. a website imported from OPML file):
+_HTML = b"""<!DOCTYPE html>
+<html>
+<head><title>Not a feed</title></head>
+<body><p>Hello</p></body>
+</html>
+"""
+
+_PARSERS = [
+    PodcastparserFeedParser,
+    pytest.param(LxmlFeedParser, marks=pytest.mark.skipif(LxmlFeedParser is None, reason="lxml is not installed")),
+]
+
+
+@pytest.mark.parametrize("parser", _PARSERS)
+@pytest.mark.parametrize("in_executor", [False, True])
+def test_parse_feed_rejects_not_a_feed(parser: type[FeedParser], in_executor: bool) -> None:
+    async def parse() -> None:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=1) if in_executor else None
+        client = podcastie_rss.FeedClient(parse_executor=executor, parser=parser)
+        try:
+            await podcastie_rss.parse_feed(client, _FEED_URL, _HTML)
+        finally:
+            await client.close()
+            if executor:
+                executor.shutdown()
+
+    with pytest.raises(podcastie_rss.FeedParseError):
+        asyncio.run(parse())
+
+
+@pytest.mark.parametrize("parser", _PARSERS)
+def test_fetch_feed_rejects_not_a_feed(parser: type[FeedParser]) -> None:
+    async def serve(_: web.Request) -> web.Response:
+        return web.Response(body=_HTML, content_type="text/html")
+
+    async def fetch() -> None:
+        app = web.Application()
+        app.router.add_get("/feed.xml", serve)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        client = podcastie_rss.FeedClient(parser=parser)
+        try:
+            await podcastie_rss.fetch_feed(client, f"http://127.0.0.1:{port}/feed.xml")
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    with pytest.raises(podcastie_rss.FeedParseError):
+        asyncio.run(fetch())
+
+
+@pytest.mark.parametrize("host_concurrency", [1, 4])
+def test_fetch_feed_queued_on_throttled_host_fails_fast(host_concurrency: int) -> None:
+    async def serve(_: web.Request) -> web.Response:
+        await asyncio.sleep(0.2)
+        return web.Response(status=429, headers={"Retry-After": "6"})
+
+    async def fetch() -> list[BaseException | None]:
+        app = web.Application()
+        app.router.add_get("/{name}.xml", serve)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        # requests wait either for the host semaphore or for their start time while the first one is being made:
+        client = podcastie_rss.FeedClient(
+            host_concurrency=host_concurrency, host_request_interval=0.5, max_throttle_wait=1
+        )
+        try:
+            return await asyncio.gather(
+                *(podcastie_rss.fetch_feed(client, f"http://127.0.0.1:{port}/{i}.xml") for i in range(4)),
+                return_exceptions=True,
+            )
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    loop = asyncio.new_event_loop()
+    try:
+        started = loop.time()
+        results = loop.run_until_complete(fetch())
+        elapsed = loop.time() - started
+    finally:
+        loop.close()
+
+    assert all(isinstance(result, podcastie_rss.FeedThrottledError) for result in results)
+    assert elapsed < 2
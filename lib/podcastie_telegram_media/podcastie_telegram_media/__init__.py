@@ -0,0 +1 @@
+from podcastie_telegram_media.cache import MediaDownloadError, TelegramMediaCache
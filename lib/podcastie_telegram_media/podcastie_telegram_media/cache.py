@@ -0,0 +1,198 @@
+import asyncio
+import collections
+import hashlib
+import posixpath
+import typing
+import urllib.parse
+import weakref
+
+import aiohttp
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, InputFile, Message
+from podcastie_database.models.telegram_file import TelegramFileDocument
+
+_DEFAULT_MAX_SIZE = 4096  # max number of file IDs kept in memory
+_DEFAULT_MAX_PHOTO_SIZE = 10 * 1024 * 1024  # max size of photos allowed by Telegram (bytes)
+_DEFAULT_DOWNLOAD_TIMEOUT = 60  # timeout for photo download (seconds)
+
+
+class MediaDownloadError(Exception):
+    pass
+
+
+def _invalid_file_id(e: TelegramBadRequest) -> bool:
+    """Tells whether Telegram has rejected the file ID the file was sent by."""
+    return "file identifier" in e.message
+
+
+class TelegramMediaCache:
+    """
+    Keeps IDs of files uploaded to Telegram by URLs the files have been downloaded from, so that every file
+    is uploaded once (by any process) and is sent by its ID afterwards. IDs are stored in the database,
+    the max_size most recently used ones are also kept in memory.
+
+    Photos are downloaded before they're uploaded, and are told apart by hashes of their content too,
+    so that a photo available at several URLs is uploaded once. Files are expected not to change at their URLs
+    (e.g. podcast cover URLs change when the covers do), files which are not used anymore may be forgotten.
+
+    While a file is being uploaded, others who are to send it wait for the upload and send it by its ID.
+    If Telegram does not accept an ID anymore, the file is uploaded again.
+    """
+
+    _session: aiohttp.ClientSession | None
+    _max_size: int
+    _max_photo_size: int
+    _timeout: aiohttp.ClientTimeout
+    _file_ids: collections.OrderedDict[str, str]  # most recently used file IDs by URLs, the latest used last
+    _upload_locks: weakref.WeakValueDictionary[str, asyncio.Lock]  # held while files are being uploaded, by URLs
+
+    def __init__(
+        self,
+        max_size: int = _DEFAULT_MAX_SIZE,
+        max_photo_size: int = _DEFAULT_MAX_PHOTO_SIZE,
+        download_timeout: int = _DEFAULT_DOWNLOAD_TIMEOUT,
+    ):
+        self._session = None
+        self._max_size = max_size
+        self._max_photo_size = max_photo_size
+        self._timeout = aiohttp.ClientTimeout(total=download_timeout)
+        self._file_ids = collections.OrderedDict()
+        self._upload_locks = weakref.WeakValueDictionary()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def file_id(self, url: str) -> str | None:
+        """Returns ID of the file downloaded from the URL, None if it has not been uploaded yet."""
+        file_id = self._file_ids.get(url)
+        if file_id is not None:
+            self._file_ids.move_to_end(url)
+            return file_id
+
+        document = await TelegramFileDocument.find_one(TelegramFileDocument.url == url)
+        if document is None:
+            return None
+
+        self._remember(url, document.file_id)
+        return document.file_id
+
+    async def save(self, url: str, file_id: str, content_hash: str | None = None) -> None:
+        """Saves ID of the file downloaded from the URL and uploaded to Telegram."""
+        await TelegramFileDocument.get_motor_collection().update_one(
+            {"url": url}, {"$set": {"file_id": file_id, "content_hash": content_hash}}, upsert=True
+        )
+        self._remember(url, file_id)
+
+    async def forget(self, url: str, file_id: str | None = None) -> None:
+        """Forgets ID of the file downloaded from the URL (only if it's the file_id, if provided)."""
+        if file_id is None or self._file_ids.get(url) == file_id:
+            self._file_ids.pop(url, None)
+
+        query: dict[str, typing.Any] = {"url": url}
+        if file_id is not None:
+            query["file_id"] = file_id
+        await TelegramFileDocument.find_one(query).delete()
+
+    async def send_file(
+        self,
+        url: str,
+        send: typing.Callable[[str], typing.Awaitable[Message]],
+        upload: typing.Callable[[], typing.Awaitable[Message]],
+        uploaded_file_id: typing.Callable[[Message], str | None],
+    ) -> Message:
+        """
+        Sends the file downloaded from the URL by its file ID with send if the file has been uploaded,
+        or uploads it with upload otherwise. uploaded_file_id returns ID of the file uploaded with the message.
+        Files sent this way are uploaded unread (e.g. audio files which are too large to be hashed).
+        """
+
+        async def upload_file() -> tuple[Message, str | None]:
+            return await upload(), None
+
+        return await self._send(url, send, upload_file, uploaded_file_id)
+
+    async def send_photo(
+        self, url: str, send: typing.Callable[[InputFile | str], typing.Awaitable[Message]]
+    ) -> Message:
+        """
+        Sends the photo downloaded from the URL with send, passing it the photo file ID if the photo has been uploaded,
+        or the photo to upload otherwise. Raises MediaDownloadError if the photo failed to be downloaded.
+        """
+
+        async def upload_photo() -> tuple[Message, str | None]:
+            content = await self._download(url)
+            content_hash = hashlib.sha256(content).hexdigest()
+
+            # the same photo may have been uploaded from another URL:
+            document = await TelegramFileDocument.find_one(TelegramFileDocument.content_hash == content_hash)
+            if document is not None:
+                try:
+                    return await send(document.file_id), content_hash
+                except TelegramBadRequest as e:
+                    if not _invalid_file_id(e):
+                        raise
+                    await document.delete()
+
+            filename = posixpath.basename(urllib.parse.urlsplit(url).path) or "photo.jpg"
+            return await send(BufferedInputFile(content, filename=filename)), content_hash
+
+        return await self._send(url, send, upload_photo, lambda message: message.photo[-1].file_id)
+
+    async def _send(
+        self,
+        url: str,
+        send: typing.Callable[[str], typing.Awaitable[Message]],
+        upload: typing.Callable[[], typing.Awaitable[tuple[Message, str | None]]],
+        uploaded_file_id: typing.Callable[[Message], str | None],
+    ) -> Message:
+        file_id = await self.file_id(url)
+        if file_id is None:
+            # the lock is kept in the dictionary as long as someone holds a reference to it:
+            lock = self._upload_locks.get(url)
+            if lock is None:
+                lock = asyncio.Lock()
+                self._upload_locks[url] = lock
+
+            async with lock:
+                file_id = await self.file_id(url)
+                if file_id is None:
+                    message, content_hash = await upload()
+                    file_id = uploaded_file_id(message)
+                    if file_id is not None:
+                        await self.save(url, file_id, content_hash)
+                    return message
+
+        try:
+            return await send(file_id)
+        except TelegramBadRequest as e:
+            if not _invalid_file_id(e):
+                raise
+
+        # Telegram does not accept the ID anymore (e.g. as the bot has changed),
+        # then the file is uploaded again (unless someone else has already done so):
+        await self.forget(url, file_id)
+        return await self._send(url, send, upload, uploaded_file_id)
+
+    async def _download(self, url: str) -> bytes:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=self._timeout)
+
+        try:
+            async with self._session.get(url) as response:
+                response.raise_for_status()
+                content = await response.content.read(self._max_photo_size + 1)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise MediaDownloadError("failed to download photo") from e
+
+        if len(content) > self._max_photo_size:
+            raise MediaDownloadError(f"photo exceeds size limit of {self._max_photo_size} bytes")
+
+        return content
+
+    def _remember(self, url: str, file_id: str) -> None:
+        self._file_ids[url] = file_id
+        self._file_ids.move_to_end(url)
+        if len(self._file_ids) > self._max_size:
+            self._file_ids.popitem(last=False)
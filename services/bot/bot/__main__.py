@@ -8,6 +8,8 @@ from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from podcastie_database.init import init_database
+from podcastie_rss import FeedClient
+from podcastie_telegram_media import TelegramMediaCache
 
 from bot.aiogram_view.router import ViewRouter
 from bot.callback_data.entrypoints import (
@@ -149,7 +151,19 @@ async def main() -> None:
     )
     dp["bot"] = bot
 
-    await dp.start_polling(bot)
+    # create RSS feed client shared by all handlers:
+    feed_client = FeedClient()
+    dp["feed_client"] = feed_client
+
+    # create Telegram media cache shared by all handlers (and with feed poller through the database):
+    media_cache = TelegramMediaCache()
+    dp["media_cache"] = media_cache
+
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await feed_client.close()
+        await media_cache.close()
 
 
 if __name__ == "__main__":
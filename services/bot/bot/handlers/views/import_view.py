@@ -9,6 +9,7 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 from podcastie_core.podcast import Podcast, PodcastFeedError, PodcastNotFoundError
 from podcastie_core.service import follow_podcast
 from podcastie_core.user import User, UserFollowsPodcastError
+from podcastie_rss import FeedClient
 from podcastie_telegram_html.tags import link
 
 from bot.aiogram_view.view import View
@@ -48,7 +49,7 @@ def _build_result_reply_markup(failure: bool = False) -> InlineKeyboardMarkup:
 
 
 async def _follow_podcasts(
-    user: User, feed_urls: list[str]
+    user: User, feed_urls: list[str], feed_client: FeedClient
 ) -> tuple[list[Podcast], list[tuple[Podcast | str, str]]]:
     followed: list[Podcast] = []
     failed_to_follow: list[tuple[Podcast | str, str]] = []
@@ -62,7 +63,7 @@ async def _follow_podcasts(
             podcast = await Podcast.from_feed_url(url)
         except PodcastNotFoundError:
             try:
-                podcast = await Podcast.new_from_feed_url(url)
+                podcast = await Podcast.new_from_feed_url(url, feed_client)
             except PodcastFeedError:
                 failed_to_follow.append((url, "failed to fetch RSS feed"))
                 continue
@@ -72,6 +73,10 @@ async def _follow_podcasts(
         except UserFollowsPodcastError:
             failed_to_follow.append((podcast, "you already follow this podcast"))
             continue
+        except PodcastNotFoundError:
+            # the podcast may have been deleted since it was found (see Compactor):
+            failed_to_follow.append((podcast, "podcast not found"))
+            continue
 
         followed.append(podcast)
 
@@ -99,6 +104,7 @@ class ImportView(View):
         state: FSMContext = data["state"]
         bot: Bot = data["bot"]
         user: User = data["user"]
+        feed_client: FeedClient = data["feed_client"]
 
         await state.clear()
 
@@ -152,7 +158,9 @@ class ImportView(View):
 
         # remove duplicated feed URLs
         feed_urls = list(set(feed_urls))
-        followed, failed_to_follow = await _follow_podcasts(user, feed_urls)
+        followed, failed_to_follow = await _follow_podcasts(
+            user, feed_urls, feed_client
+        )
 
         text = ""
         if followed:
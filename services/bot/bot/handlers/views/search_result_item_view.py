@@ -2,7 +2,7 @@ import typing
 
 from aiogram import Bot
 from aiogram.enums import ChatAction
-from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message, URLInputFile
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from beanie import PydanticObjectId
 from podcastie_core.podcast import Podcast, PodcastNotFoundError
@@ -18,6 +18,7 @@ from podcastie_core.user import (
 )
 from podcastie_telegram_html.tags import blockquote, bold
 from podcastie_telegram_html.util import escape
+from podcastie_telegram_media import MediaDownloadError, TelegramMediaCache
 
 from bot.aiogram_view.view import View
 from bot.callback_data.entrypoints import (
@@ -93,6 +94,8 @@ class SearchResultView(View):
                     await event.answer(
                         f"🔔 You already follow {podcast.document.meta.title}."
                     )
+                except PodcastNotFoundError:
+                    await event.answer("⚠️ Podcast not found.", show_alert=True)
 
             case SearchResultAction.unfollow:
                 try:
@@ -141,14 +144,24 @@ class SearchResultView(View):
                         podcast.document.id, podcast.document.meta.link
                     )
 
-                if podcast.document.meta.cover_url:
-                    await bot.send_chat_action(
-                        event.chat.id, ChatAction.UPLOAD_PHOTO
-                    )  # Todo: cache telegram_file_ids
+                cover_url = podcast.document.meta.cover_url
+                if not cover_url:
+                    await event.answer(text, reply_markup=markup)
+                    return
 
-                    photo = URLInputFile(podcast.document.meta.cover_url)
-                    await event.answer_photo(photo, caption=text, reply_markup=markup)
-                else:
+                # covers are uploaded once and sent by their file IDs afterwards:
+                media_cache: TelegramMediaCache = data["media_cache"]
+                if await media_cache.file_id(cover_url) is None:
+                    await bot.send_chat_action(event.chat.id, ChatAction.UPLOAD_PHOTO)
+
+                try:
+                    await media_cache.send_photo(
+                        cover_url,
+                        lambda photo: event.answer_photo(
+                            photo, caption=text, reply_markup=markup
+                        ),
+                    )
+                except MediaDownloadError:
                     await event.answer(text, reply_markup=markup)
 
             case _:
@@ -79,6 +79,11 @@ class StartView(View):
                         f"⚠️ You already follow {bold(podcast.document.meta.title)}.",
                         reply_markup=self._build_keyboard_markup(),
                     )
+                except PodcastNotFoundError:
+                    await event.answer(
+                        "⚠️ Podcast you are trying to follow using Instant Link does not exist.",
+                        reply_markup=self._build_keyboard_markup(),
+                    )
                 else:
                     await event.answer(
                         f"🌟 You have successfully subscribed to {bold(podcast.document.meta.title)}.",
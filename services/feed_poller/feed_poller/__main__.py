@@ -1,22 +1,43 @@
 import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
 import structlog
 from aiogram import Bot
 from aiogram.client.default import DefaultBotProperties
 from aiogram.client.session.aiohttp import AiohttpSession
-from aiogram.client.telegram import TelegramAPIServer
+from aiogram.client.telegram import BareFilesPathWrapper, FilesPathWrapper, SimpleFilesPathWrapper, TelegramAPIServer
 from aiogram.enums import ParseMode
 from aiogram.types import LinkPreviewOptions
+from aiohttp import web
 from podcastie_database.init import init_database
-from podcastie_rss import Episode
+from podcastie_rss import FeedClient
+from podcastie_telegram_media import TelegramMediaCache
 
+from feed_poller.audio_cache import AudioCache
+from feed_poller.check_scheduler import CheckScheduler
+from feed_poller.compactor import Compactor
 from feed_poller.env import Env
 from feed_poller.episode_broadcaster import EpisodeBroadcaster
 from feed_poller.feed_poller import FeedPoller
+from feed_poller.message_scheduler import MessageScheduler
+from feed_poller.websub import WebSubSubscriber
+from feed_poller.websub_callback import WebSubCallback
 
 
-def new_bot(bot_token: str, bot_api_host: str, bot_api_port: int) -> Bot:
-    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://{bot_api_host}:{bot_api_port}"))
+def new_bot(
+    bot_token: str,
+    bot_api_host: str,
+    bot_api_port: int,
+    bot_api_local: bool = False,
+    wrap_local_file: FilesPathWrapper = BareFilesPathWrapper(),
+) -> Bot:
+    session = AiohttpSession(
+        api=TelegramAPIServer.from_base(
+            f"http://{bot_api_host}:{bot_api_port}", is_local=bot_api_local, wrap_local_file=wrap_local_file
+        )
+    )
 
     return Bot(
         token=bot_token,
@@ -25,6 +46,118 @@ def new_bot(bot_token: str, bot_api_host: str, bot_api_port: int) -> Bot:
     )
 
 
+async def poll_feeds(env: Env, media_cache: TelegramMediaCache, audio_cache: AudioCache | None) -> None:
+    log: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+    # feeds are parsed in worker processes if configured, so that large feeds don't block the event loop:
+    parse_executor: ProcessPoolExecutor | None = None
+    if env.FeedPoller.PARSE_WORKERS > 0:
+        parse_executor = ProcessPoolExecutor(
+            max_workers=env.FeedPoller.PARSE_WORKERS, mp_context=multiprocessing.get_context("forkserver")
+        )
+
+    feed_client = FeedClient(
+        parse_executor=parse_executor,
+        host_concurrency=env.FeedPoller.HOST_CONCURRENCY,
+        host_request_interval=env.FeedPoller.HOST_REQUEST_INTERVAL,
+        max_body_size=env.FeedPoller.MAX_FEED_SIZE,
+    )
+
+    # feeds delivered by WebSub hubs are subscribed to if the callback server is reachable from outside:
+    websub_subscriber: WebSubSubscriber | None = None
+    if env.WebSub.CALLBACK_URL:
+        websub_subscriber = WebSubSubscriber(
+            feed_client.session,
+            env.WebSub.CALLBACK_URL,
+            lease=env.WebSub.LEASE,
+            fallback_interval=env.WebSub.FALLBACK_INTERVAL,
+        )
+
+    feed_poller = FeedPoller(
+        feed_client,
+        interval=env.FeedPoller.INTERVAL,
+        request_interval=env.FeedPoller.REQUEST_INTERVAL,
+        lease=env.FeedPoller.LEASE,
+        claim_batch_size=env.FeedPoller.CLAIM_BATCH_SIZE,
+        fetch_workers=env.FeedPoller.FETCH_WORKERS,
+        write_workers=env.FeedPoller.WRITE_WORKERS,
+        write_batch_size=env.FeedPoller.WRITE_BATCH_SIZE,
+        fetch_attempts=env.FeedPoller.FETCH_ATTEMPTS,
+        check_scheduler=CheckScheduler(
+            min_interval=env.FeedPoller.MIN_CHECK_INTERVAL,
+            max_interval=env.FeedPoller.MAX_CHECK_INTERVAL,
+            max_backoff_interval=env.FeedPoller.MAX_BACKOFF_INTERVAL,
+        ),
+        websub_subscriber=websub_subscriber,
+        media_cache=media_cache,
+        audio_cache=audio_cache,
+    )
+
+    websub_runner: web.AppRunner | None = None
+    try:
+        if websub_subscriber:
+            log.info("starting WebSub callback server...")
+            websub_runner = web.AppRunner(WebSubCallback(feed_poller, feed_client).app())
+            await websub_runner.setup()
+            await web.TCPSite(websub_runner, env.WebSub.HOST, env.WebSub.PORT).start()
+
+        log.info("starting feed poller...")
+        await feed_poller.poll_feeds()
+    finally:
+        if websub_runner:
+            await websub_runner.cleanup()
+        await feed_client.close()
+        if parse_executor:
+            parse_executor.shutdown(cancel_futures=True)
+
+
+async def broadcast_episodes(env: Env, media_cache: TelegramMediaCache, audio_cache: AudioCache | None) -> None:
+    log: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+    # if Bot API server runs in local mode, cached audio is uploaded by its path in the directory shared with the server
+    # (paths are translated if the directory is mounted to another path there):
+    wrap_local_file: FilesPathWrapper = BareFilesPathWrapper()
+    if env.TelegramBot.API_AUDIO_CACHE_DIRECTORY:
+        wrap_local_file = SimpleFilesPathWrapper(
+            server_path=Path(env.TelegramBot.API_AUDIO_CACHE_DIRECTORY),
+            local_path=Path(env.AudioCache.DIRECTORY).resolve(),
+        )
+    if env.TelegramBot.API_LOCAL and audio_cache is None:
+        log.warning("Bot API server runs in local mode, but audio cache is disabled: audio is uploaded in requests")
+
+    episode_broadcaster = EpisodeBroadcaster(
+        bot=new_bot(
+            env.TelegramBot.TOKEN,
+            env.TelegramBot.API_HOST,
+            env.TelegramBot.API_PORT,
+            bot_api_local=env.TelegramBot.API_LOCAL,
+            wrap_local_file=wrap_local_file,
+        ),
+        scheduler=MessageScheduler(
+            rate=env.Broadcaster.MESSAGE_RATE,
+            burst=env.Broadcaster.MESSAGE_BURST,
+            chat_interval=env.Broadcaster.CHAT_MESSAGE_INTERVAL,
+        ),
+        media_cache=media_cache,
+        interval=env.Broadcaster.INTERVAL,
+        lease=env.Broadcaster.LEASE,
+        concurrency=env.Broadcaster.CONCURRENCY,
+        audio_cache=audio_cache,
+    )
+
+    log.info("starting episode broadcaster...")
+    await episode_broadcaster.broadcast_episodes()
+
+
+async def compact_podcasts(env: Env) -> None:
+    log: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+    compactor = Compactor(interval=env.Compactor.INTERVAL, grace_period=env.Compactor.GRACE_PERIOD)
+
+    log.info("starting compactor...")
+    await compactor.compact()
+
+
 async def main() -> None:
     log: structlog.stdlib.BoundLogger = structlog.get_logger()
 
@@ -35,21 +168,31 @@ async def main() -> None:
     log.info("connecting to the database...")
     await init_database(env.Mongo.HOST, env.Mongo.PORT, env.Mongo.DATABASE)
 
-    episodes_queue: asyncio.Queue[Episode] = asyncio.Queue()
+    # feed poller and episode broadcaster only share the database (new episodes are passed through the outbox),
+    # so that they can run in separate processes and be scaled independently.
+    # file IDs of media uploaded to Telegram are shared with the bot through the database as well:
+    media_cache = TelegramMediaCache()
 
-    feed_poller = FeedPoller(episodes_queue, interval=env.FeedPoller.INTERVAL)
-    episode_broadcaster = EpisodeBroadcaster(
-        episodes_queue,
-        bot=new_bot(env.TelegramBot.TOKEN, env.TelegramBot.API_HOST, env.TelegramBot.API_PORT),
-        interval=1,
-    )
+    # episode audio is cached on disk if it's broadcast by the process, feed poller starts downloading
+    # audio of new episodes when it finds them:
+    audio_cache: AudioCache | None = None
+    if env.Broadcaster.ENABLED and env.AudioCache.ENABLED:
+        audio_cache = AudioCache(env.AudioCache.DIRECTORY, max_size=env.AudioCache.MAX_SIZE)
+
+    tasks = []
+    if env.FeedPoller.ENABLED:
+        tasks.append(poll_feeds(env, media_cache, audio_cache))
+    if env.Broadcaster.ENABLED:
+        tasks.append(broadcast_episodes(env, media_cache, audio_cache))
+    if env.Compactor.ENABLED:
+        tasks.append(compact_podcasts(env))
 
-    log.info("starting feed poller...")
-    tasks = [
-        feed_poller.poll_feeds(),
-        episode_broadcaster.broadcast_episodes(),
-    ]
-    await asyncio.gather(*tasks)
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        await media_cache.close()
+        if audio_cache:
+            await audio_cache.close()
 
 
 if __name__ == "__main__":
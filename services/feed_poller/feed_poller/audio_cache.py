@@ -0,0 +1,241 @@
+import asyncio
+import collections
+import contextlib
+import hashlib
+import os
+import pathlib
+import tempfile
+import typing
+
+import aiohttp
+import structlog
+
+_DEFAULT_MAX_FILE_SIZE = 2000 * 1024 * 1024  # max audio file size allowed by Telegram (bytes)
+_DEFAULT_DOWNLOAD_TIMEOUT = 20 * 60  # timeout for audio download (seconds)
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # size of chunks audio is written to disk by (bytes)
+
+_CHECKSUM_SUFFIX = ".sha256"
+_PARTIAL_SUFFIX = ".part"
+
+
+class AudioDownloadError(Exception):
+    pass
+
+
+def _file_checksum(path: pathlib.Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(_DOWNLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class AudioCache:
+    """
+    Keeps episode audio files in the directory, so that audio is downloaded ahead of uploading it to Telegram
+    (see prefetch), uploads don't wait for podcast CDNs, and failed uploads are retried without downloading again.
+
+    Every file is downloaded once, downloads of a file requested at once share the same download. Checksum of a file
+    is saved next to it and is verified when the file is used for the first time after the cache is created
+    (e.g. after restart), files which don't match their checksums are downloaded again. Files which have not been
+    used for the longest time are deleted once total size of the files exceeds max_size, unless they're in use.
+    The directory must not be shared by several caches (it may be shared with other processes which read the files,
+    e.g. with Bot API server running in local mode, which audio is uploaded to by its path then).
+    """
+
+    _directory: pathlib.Path
+    _max_size: int
+    _max_file_size: int
+    _timeout: aiohttp.ClientTimeout
+    _session: aiohttp.ClientSession | None
+
+    _files: collections.OrderedDict[str, int]  # sizes of cached files by their keys, the least recently used first
+    _size: int  # total size of cached files (bytes)
+    _verified: set[str]  # keys of files whose checksums have been verified
+    _downloads: dict[str, asyncio.Task[None]]  # downloads in progress by keys of files
+    _users: collections.Counter[str]  # number of users of files by their keys
+
+    def __init__(
+        self,
+        directory: str,
+        max_size: int,
+        max_file_size: int = _DEFAULT_MAX_FILE_SIZE,
+        download_timeout: int = _DEFAULT_DOWNLOAD_TIMEOUT,
+    ):
+        self._directory = pathlib.Path(directory).resolve()
+        self._max_size = max_size
+        self._max_file_size = max_file_size
+        self._timeout = aiohttp.ClientTimeout(total=download_timeout)
+        self._session = None
+
+        self._files = collections.OrderedDict()
+        self._size = 0
+        self._verified = set()
+        self._downloads = {}
+        self._users = collections.Counter()
+
+        self._load()
+
+    async def close(self) -> None:
+        for download in self._downloads.values():
+            download.cancel()
+        await asyncio.gather(*self._downloads.values(), return_exceptions=True)
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def prefetch(self, url: str, size: int | None = None) -> None:
+        """
+        Starts downloading the audio file from the URL in background, unless it's cached or is being downloaded.
+        size is the expected size of the file, files known to exceed max_file_size are not downloaded.
+        """
+        if size is not None and size > self._max_file_size:
+            return
+
+        key = self._key(url)
+        if key not in self._files:
+            self._download(url, key)
+
+    @contextlib.asynccontextmanager
+    async def open(self, url: str) -> typing.AsyncIterator[pathlib.Path]:
+        """
+        Yields path to the audio file downloaded from the URL, downloading it first if it's not cached.
+        The file is not deleted until the context is exited. Raises AudioDownloadError if the file failed to download.
+        """
+        key = self._key(url)
+        self._users[key] += 1
+        try:
+            while True:
+                if key not in self._files:
+                    # the download is shielded, so that it's not cancelled with one of the files' users:
+                    await asyncio.shield(self._download(url, key))
+
+                if key in self._verified:
+                    break
+
+                # the file is checked once, as it's not expected to be damaged while the cache is running:
+                path = self._path(key)
+                checksum = self._checksum_path(key).read_text().strip()
+                if await asyncio.to_thread(_file_checksum, path) == checksum:
+                    self._verified.add(key)
+                    break
+
+                structlog.get_logger().bind(url=url).warning("cached audio file is damaged, downloading it again")
+                self._delete(key)
+
+            self._files.move_to_end(key)
+            yield self._path(key)
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+            self._evict()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self._directory / key
+
+    def _checksum_path(self, key: str) -> pathlib.Path:
+        return self._directory / f"{key}{_CHECKSUM_SUFFIX}"
+
+    def _load(self) -> None:
+        """Loads files cached before, drops partially downloaded files and files without checksums."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+        files: list[tuple[float, str, int]] = []
+        for path in self._directory.iterdir():
+            if path.suffix == _PARTIAL_SUFFIX:
+                path.unlink(missing_ok=True)
+            elif path.suffix == _CHECKSUM_SUFFIX:
+                if not self._path(path.stem).exists():
+                    path.unlink(missing_ok=True)
+            elif not self._checksum_path(path.name).exists():
+                path.unlink(missing_ok=True)
+            else:
+                stat = path.stat()
+                files.append((stat.st_mtime, path.name, stat.st_size))
+
+        # files are loaded from the least recently modified one, as the order they were used in is not known:
+        for _, key, size in sorted(files):
+            self._files[key] = size
+            self._size += size
+
+        self._evict()
+
+    def _download(self, url: str, key: str) -> asyncio.Task[None]:
+        download = self._downloads.get(key)
+        if download is None:
+            download = asyncio.create_task(self._fetch(url, key))
+            download.add_done_callback(lambda task: self._downloaded(url, key, task))
+            self._downloads[key] = download
+
+        return download
+
+    def _downloaded(self, url: str, key: str, download: asyncio.Task[None]) -> None:
+        del self._downloads[key]
+
+        # failed downloads are raised to those who wait for them, and are logged, as prefetches are not waited for:
+        if not download.cancelled() and download.exception() is not None:
+            structlog.get_logger().bind(url=url, e=download.exception()).warning("failed to download audio file")
+
+    async def _fetch(self, url: str, key: str) -> None:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=self._timeout)
+
+        # the file is written under a temporary name, so that partially downloaded files are never used:
+        try:
+            fd, partial_path = tempfile.mkstemp(suffix=_PARTIAL_SUFFIX, dir=self._directory)
+        except OSError as e:
+            raise AudioDownloadError("failed to create audio file in the cache") from e
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async with self._session.get(url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_chunked(_DOWNLOAD_CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self._max_file_size:
+                            raise AudioDownloadError(f"audio file exceeds size limit of {self._max_file_size} bytes")
+
+                        digest.update(chunk)
+                        await asyncio.to_thread(f.write, chunk)
+
+            # files are readable by other processes (e.g. by Bot API server the directory is shared with):
+            os.chmod(partial_path, 0o644)
+            self._checksum_path(key).write_text(digest.hexdigest())
+            os.replace(partial_path, self._path(key))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise AudioDownloadError("failed to download audio file") from e
+        except OSError as e:
+            # e.g. the disk is full, then the checksum may have been written without the file:
+            self._checksum_path(key).unlink(missing_ok=True)
+            raise AudioDownloadError("failed to write audio file to the cache") from e
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(partial_path)
+
+        self._files[key] = size
+        self._size += size
+        self._verified.add(key)
+        self._evict()
+
+    def _delete(self, key: str) -> None:
+        self._size -= self._files.pop(key)
+        self._verified.discard(key)
+        self._path(key).unlink(missing_ok=True)
+        self._checksum_path(key).unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        """Deletes the least recently used files which are not in use until the files fit max_size."""
+        for key in list(self._files):
+            if self._size <= self._max_size:
+                break
+            if key not in self._users:
+                self._delete(key)
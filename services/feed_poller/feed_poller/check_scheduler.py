@@ -0,0 +1,72 @@
+import random
+import time
+
+import podcastie_rss
+from podcastie_database.models.podcast import PodcastPollingModel
+
+_PUBLICATION_INTERVAL_WEIGHT = 0.3  # weight of the latest interval between episodes in the moving average
+_CADENCE_FRACTION = 0.05  # part of the expected interval between episodes feeds are checked at
+_JITTER = 0.1  # max deviation of check intervals, relative to them
+
+
+def update_publication_interval(podcast: PodcastPollingModel, new_episodes: list[podcastie_rss.Episode]) -> None:
+    """Updates moving average of intervals between episodes of the podcast with its new episodes."""
+    previous = podcast.latest_episode_publication_timestamp
+    for episode in new_episodes:
+        # episodes published at once (e.g. when a season is released) are not counted:
+        if previous is not None and episode.published > previous:
+            interval = episode.published - previous
+            if podcast.publication_interval is None:
+                podcast.publication_interval = interval
+            else:
+                podcast.publication_interval = int(
+                    podcast.publication_interval * (1 - _PUBLICATION_INTERVAL_WEIGHT)
+                    + interval * _PUBLICATION_INTERVAL_WEIGHT
+                )
+        previous = episode.published
+
+
+class CheckScheduler:
+    """
+    Schedules checks of podcast feeds according to how often podcasts publish episodes, so that feeds of active podcasts
+    are checked often, and feeds of podcasts which publish rarely (or have stopped publishing) are checked rarely.
+
+    Feeds are not checked sooner than their servers ask to (e.g. as they're cached for some time and won't change
+    until then), unless it's later than max_interval. Check times are jittered, so that feeds checked at once
+    drift apart and are not all due at the same time again.
+
+    Feeds which keep failing are backed off from: each consecutive failure doubles the interval they're checked at,
+    up to max_backoff_interval, so that dead origins are only probed once in a while.
+    """
+
+    _min_interval: int
+    _max_interval: int
+    _max_backoff_interval: int
+
+    def __init__(self, min_interval: int, max_interval: int, max_backoff_interval: int):
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._max_backoff_interval = max_backoff_interval
+
+    def check_interval(self, podcast: PodcastPollingModel, not_sooner_than: float | None = None) -> float:
+        """
+        Returns interval the podcast feed should be checked at (seconds).
+        not_sooner_than is the time the feed server asked not to check the feed sooner than (seconds).
+        """
+        # an episode is expected to be published once in the average interval between episodes,
+        # or even less often if the podcast has not published any for longer than that:
+        expected_interval = podcast.publication_interval or 0
+        if podcast.latest_episode_publication_timestamp:
+            expected_interval = max(expected_interval, time.time() - podcast.latest_episode_publication_timestamp)
+
+        interval = max(expected_interval * _CADENCE_FRACTION, not_sooner_than or 0)
+        return min(max(interval, self._min_interval), self._max_interval)
+
+    def backoff_interval(self, failures: int) -> float:
+        """Returns interval the feed which has failed to be checked failures times in a row should be checked at."""
+        return min(self._min_interval * 2 ** (failures - 1), self._max_backoff_interval)
+
+    @staticmethod
+    def next_check_at(interval: float) -> int:
+        """Returns timestamp of the check in the interval from now, jittered."""
+        return int(time.time() + interval * random.uniform(1 - _JITTER, 1 + _JITTER))
@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+import structlog
+from podcastie_core.service import delete_dormant_podcasts, followed_podcast_ids, wake_followed_podcasts
+
+
+class Compactor:
+    """
+    Every interval seconds, deletes podcasts which have been dormant (have had no followers, see FeedPoller)
+    for longer than grace_period seconds, so that podcasts nobody follows anymore don't pile up in the database.
+    Dormant podcasts which are followed (e.g. as they were followed while becoming dormant) are woken up instead.
+    """
+
+    _interval: int
+    _grace_period: int
+
+    def __init__(self, interval: int, grace_period: int):
+        self._interval = interval
+        self._grace_period = grace_period
+
+    async def compact(self) -> None:
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
+        while True:
+            try:
+                followed = await followed_podcast_ids()
+                woken = await wake_followed_podcasts(followed)
+                deleted = await delete_dormant_podcasts(int(time.time()) - self._grace_period, followed)
+                log.bind(woken=woken, deleted=deleted).info("compacted podcasts")
+            except Exception:
+                log.exception("failed to compact podcasts")
+
+            log.info(f"task is sleeping for {self._interval} sec")
+            await asyncio.sleep(self._interval)
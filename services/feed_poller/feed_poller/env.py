@@ -1,17 +1,78 @@
 from minicfg import Field, Minicfg, minicfg_prefix
-from minicfg.caster import to_int
+from minicfg.caster import to_bool, to_float, to_int
 
 
 @minicfg_prefix("FEED_POLLER")
 class Env(Minicfg):
     class FeedPoller(Minicfg):
-        INTERVAL = Field(caster=to_int)
+        ENABLED: bool = Field(default=True, caster=to_bool)  # whether the process polls feeds
+        INTERVAL = Field(caster=to_int)  # interval feeds due to be checked are looked for at (seconds)
+        REQUEST_INTERVAL: float = Field(
+            default=1, caster=to_float
+        )  # interval checks requested ahead of schedule are looked for at (seconds)
+        MIN_CHECK_INTERVAL: int = Field(default=15 * 60, caster=to_int)  # min interval between checks (seconds)
+        MAX_CHECK_INTERVAL: int = Field(default=24 * 60 * 60, caster=to_int)  # max interval between checks (seconds)
+        MAX_BACKOFF_INTERVAL: int = Field(
+            default=7 * 24 * 60 * 60, caster=to_int
+        )  # max interval between checks of feeds which keep failing (seconds)
+        FETCH_ATTEMPTS: int = Field(default=3, caster=to_int)  # max number of attempts to fetch a feed in a check
+        LEASE: int = Field(default=10 * 60, caster=to_int)  # time a replica claims podcasts it checks for (seconds)
+        CLAIM_BATCH_SIZE: int = Field(default=100, caster=to_int)  # number of podcasts a replica claims at once
+        FETCH_WORKERS: int = Field(default=16, caster=to_int)  # max number of feeds fetched at a time
+        WRITE_WORKERS: int = Field(default=4, caster=to_int)  # max number of podcasts handled by write stage at a time
+        WRITE_BATCH_SIZE: int = Field(default=100, caster=to_int)  # max number of podcasts saved in a bulk write
+        PARSE_WORKERS: int = Field(default=0, caster=to_int)  # number of feed parsing processes (0 to parse in-loop)
+        HOST_CONCURRENCY: int = Field(default=4, caster=to_int)  # max number of simultaneous requests to a host
+        HOST_REQUEST_INTERVAL: float = Field(default=0.25, caster=to_float)  # min seconds between requests to a host
+        MAX_FEED_SIZE: int = Field(default=64 * 1024 * 1024, caster=to_int)  # max size of a feed read (bytes)
+
+    @minicfg_prefix("WEBSUB")
+    class WebSub(Minicfg):
+        CALLBACK_URL: str = Field(default="")  # public URL of the callback server root (WebSub is disabled if empty)
+        HOST: str = Field(default="0.0.0.0")  # host the callback server listens on
+        PORT: int = Field(default=8080, caster=to_int)  # port the callback server listens on
+        LEASE: int = Field(default=10 * 24 * 60 * 60, caster=to_int)  # subscription lease asked from hubs (seconds)
+        FALLBACK_INTERVAL: int = Field(default=6 * 60 * 60, caster=to_int)  # polling interval of pushed feeds (seconds)
+
+    @minicfg_prefix("COMPACTOR")
+    class Compactor(Minicfg):
+        ENABLED: bool = Field(default=True, caster=to_bool)  # whether the process deletes dormant podcasts
+        INTERVAL: int = Field(default=60 * 60, caster=to_int)  # interval dormant podcasts are looked for at (seconds)
+        GRACE_PERIOD: int = Field(
+            default=30 * 24 * 60 * 60, caster=to_int
+        )  # time podcasts are kept for after they become dormant (seconds)
+
+    @minicfg_prefix("BROADCASTER")
+    class Broadcaster(Minicfg):
+        ENABLED: bool = Field(default=True, caster=to_bool)  # whether the process delivers episodes from the outbox
+        INTERVAL: int = Field(default=1, caster=to_int)  # pause after delivering an episode (seconds)
+        LEASE: int = Field(
+            default=30 * 60, caster=to_int
+        )  # time a broadcaster claims episodes it delivers for (seconds)
+        CONCURRENCY: int = Field(default=64, caster=to_int)  # max number of recipients notified at a time
+        MESSAGE_RATE: float = Field(default=30, caster=to_float)  # max number of messages sent per second
+        MESSAGE_BURST: int = Field(default=30, caster=to_int)  # max number of messages sent at once
+        CHAT_MESSAGE_INTERVAL: float = Field(default=1, caster=to_float)  # min seconds between messages to a chat
+
+    @minicfg_prefix("AUDIO_CACHE")
+    class AudioCache(Minicfg):
+        ENABLED: bool = Field(default=True, caster=to_bool)  # whether episode audio is downloaded before it's uploaded
+        DIRECTORY: str = Field(default="/tmp/feed_poller/audio")  # directory audio files are cached in
+        MAX_SIZE: int = Field(
+            default=10 * 1024 * 1024 * 1024, caster=to_int
+        )  # max total size of cached audio files (bytes)
 
     @minicfg_prefix("TELEGRAM_BOT")
     class TelegramBot(Minicfg):
         TOKEN: str = Field(attach_file_field=True)
         API_HOST: str = Field()
         API_PORT: int = Field(caster=to_int)
+        API_LOCAL: bool = Field(
+            default=False, caster=to_bool
+        )  # whether Bot API server runs in local mode (cached audio is uploaded by its path then)
+        API_AUDIO_CACHE_DIRECTORY: str = Field(
+            default=""
+        )  # audio cache directory as mounted to Bot API server (if it's mounted to another path)
 
     @minicfg_prefix("MONGO")
     class Mongo(Minicfg):
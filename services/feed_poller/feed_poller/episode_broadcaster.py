@@ -1,19 +1,25 @@
 import asyncio
-from asyncio import Queue
+import os
+import socket
+import typing
 
 import aiohttp
 import structlog
 from aiogram import Bot
 from aiogram.enums import ChatAction
-from aiogram.exceptions import TelegramForbiddenError
-from aiogram.types import InlineKeyboardMarkup, URLInputFile
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError, TelegramRetryAfter
+from aiogram.types import FSInputFile, InlineKeyboardMarkup, InputFile, Message, URLInputFile
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from podcastie_core.outbox import claim_episode, episode_delivered, episode_delivered_to
+from podcastie_database.models.outbox import OutboxEpisodeDocument
 from podcastie_telegram_html import tags, util
 from podcastie_telegram_html.tags import link
+from podcastie_telegram_media import MediaDownloadError, TelegramMediaCache
 from structlog import contextvars
 from tenacity import RetryError, retry, retry_if_exception_type, wait_exponential
 
-from feed_poller.broadcastable_episode import BroadcastableEpisode
+from feed_poller.audio_cache import AudioCache, AudioDownloadError
+from feed_poller.message_scheduler import MessageScheduler
 
 _AUDIO_SIZE_LIMIT = 2000 * 1024 * 1024  # max audio file size allowed by Telegram (bytes)
 _AUDIO_FILE_DOWNLOAD_TIMEOUT = 20 * 60  # timeout for audio download (seconds)
@@ -21,28 +27,43 @@ _AUDIO_FILE_UPLOAD_TIMEOUT = 20 * 60  # timeout for audio upload (seconds)
 
 _DEFAULT_UPLOAD_AUDIO_CHUNK_SIZE = 512 * 1024  # chunk size for audio upload to Telegram (bytes)
 
+_SEND_ATTEMPTS = 3  # max number of attempts to send a message Telegram responds to with flood control error
+
+_T = typing.TypeVar("_T")
+
 
 class EpisodeNotificationSender:
     _bot: Bot
-    _episode: BroadcastableEpisode
+    _scheduler: MessageScheduler
+    _media_cache: TelegramMediaCache
+    _audio_cache: AudioCache | None
+    _episode: OutboxEpisodeDocument
     _notification_text: str
 
-    _cached_episode_audio_telegram_file_id: str | None
     _cached_audio_message_inline_markup: InlineKeyboardMarkup | None
 
-    def __init__(self, bot: Bot, episode: BroadcastableEpisode):
+    def __init__(
+        self,
+        bot: Bot,
+        scheduler: MessageScheduler,
+        media_cache: TelegramMediaCache,
+        audio_cache: AudioCache | None,
+        episode: OutboxEpisodeDocument,
+    ):
         self._bot = bot
+        self._scheduler = scheduler
+        self._media_cache = media_cache
+        self._audio_cache = audio_cache
         self._episode = episode
 
         self._notification_text = self.build_notification_text(episode)
 
-        self._cached_episode_audio_telegram_file_id = None
         self._cached_audio_message_inline_markup = None
 
     @staticmethod
-    def build_notification_text(episode: BroadcastableEpisode) -> str:
+    def build_notification_text(episode: OutboxEpisodeDocument) -> str:
         text = (
-            f"🎉 {link(episode.published_by.document.meta.title, episode.published_by.document.meta.link)} "
+            f"🎉 {link(episode.podcast.title, episode.podcast.link)} "
             f"published a new episode - {link(episode.episode.title, episode.episode.link)}"
         )
 
@@ -61,44 +82,105 @@ class EpisodeNotificationSender:
         else:
             await self._send_audio_file(user_id, upload_audio_chunk_size)
 
+    async def _send_message(self, user_id: int, send: typing.Callable[[], typing.Awaitable[_T]]) -> _T:
+        # messages are sent when the scheduler allows to, and are sent again if Telegram asks to pause anyway:
+        for attempt in range(1, _SEND_ATTEMPTS + 1):
+            await self._scheduler.wait(user_id)
+            try:
+                return await send()
+            except TelegramRetryAfter as e:
+                if attempt == _SEND_ATTEMPTS:
+                    raise
+                self._scheduler.throttle(e.retry_after)
+
     @retry(retry=retry_if_exception_type(aiohttp.ClientConnectorError), wait=wait_exponential(max=60))
     async def _send_text_notification(self, user_id: int):
+        # episode art is uploaded once, and the notification is sent without it if it can't be downloaded:
         if self._episode.episode.art_url:
-            art = URLInputFile(self._episode.episode.art_url)
-            await self._bot.send_photo(user_id, art, caption=self._notification_text)
-        else:
-            await self._bot.send_message(user_id, self._notification_text)
+            try:
+                await self._media_cache.send_photo(
+                    self._episode.episode.art_url,
+                    lambda art: self._send_message(
+                        user_id, lambda: self._bot.send_photo(user_id, art, caption=self._notification_text)
+                    ),
+                )
+                return
+            except MediaDownloadError:
+                pass
+
+        await self._send_message(user_id, lambda: self._bot.send_message(user_id, self._notification_text))
 
     @retry(retry=retry_if_exception_type(aiohttp.ClientConnectorError), wait=wait_exponential(max=60))
     async def _send_uploading_file_chat_action(self, user_id: int):
-        await self._bot.send_chat_action(user_id, ChatAction.UPLOAD_DOCUMENT)
+        # the chat action takes a slot of the scheduler as messages do, but is not sent again when Telegram asks
+        # to pause, and is skipped if it fails, as it must not stop the audio from being sent:
+        await self._scheduler.wait(user_id)
+        try:
+            await self._bot.send_chat_action(user_id, ChatAction.UPLOAD_DOCUMENT)
+        except TelegramRetryAfter as e:
+            self._scheduler.throttle(e.retry_after)
+        except TelegramAPIError as e:
+            structlog.get_logger(task=self.__class__.__name__).bind(e=e).warning("failed to send chat action")
 
     @retry(retry=retry_if_exception_type(aiohttp.ClientConnectorError), wait=wait_exponential(max=60))
     async def _send_audio_file(self, user_id: int, upload_audio_chunk_size: int):
-        file: str | URLInputFile
-        if self._cached_episode_audio_telegram_file_id:
-            file = self._cached_episode_audio_telegram_file_id
-        else:
-            filename = f"{self._episode.published_by.document.meta.title} - {self._episode.episode.title}.mp3"
-            file = URLInputFile(
-                self._episode.episode.audio_file.url,
-                filename=filename,
-                chunk_size=upload_audio_chunk_size,
-                timeout=_AUDIO_FILE_DOWNLOAD_TIMEOUT,
-            )
+        # the audio is uploaded to the first recipient only, others are sent it by its Telegram file ID
+        # (the audio is not uploaded again when delivery is resumed or retried either, see TelegramMediaCache):
+        await self._media_cache.send_file(
+            self._episode.episode.audio_file.url,
+            lambda file_id: self._send_audio(user_id, file_id),
+            upload=lambda: self._upload_audio(user_id, upload_audio_chunk_size),
+            uploaded_file_id=lambda message: message.audio.file_id if message.audio else None,
+        )
 
+    async def _upload_audio(self, user_id: int, upload_audio_chunk_size: int) -> Message:
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
+        url = self._episode.episode.audio_file.url
+        filename = f"{self._episode.podcast.title} - {self._episode.episode.title}.mp3"
+
+        # the audio is uploaded from disk if it's cached, so that failed uploads are retried without downloading it,
+        # and is streamed from its URL otherwise:
+        if self._audio_cache is not None:
+            try:
+                async with self._audio_cache.open(url) as path:
+                    file: InputFile | str
+                    if self._bot.session.api.is_local:
+                        # Bot API server in local mode reads the audio from the directory shared with it by its path,
+                        # so that the audio is not sent in the request:
+                        file = f"file://{self._bot.session.api.wrap_local_file.to_server(path)}"
+                    else:
+                        file = FSInputFile(path, filename=filename, chunk_size=upload_audio_chunk_size)
+
+                    return await self._send_audio(user_id, file, upload=True)
+            except AudioDownloadError as e:
+                log.bind(e=e).warning("failed to download audio file to the cache, uploading it from its URL")
+
+        return await self._send_audio(
+            user_id,
+            URLInputFile(
+                url, filename=filename, chunk_size=upload_audio_chunk_size, timeout=_AUDIO_FILE_DOWNLOAD_TIMEOUT
+            ),
+            upload=True,
+        )
+
+    async def _send_audio(self, user_id: int, file: InputFile | str, upload: bool = False) -> Message:
+        # thumbnails can't be sent by file IDs, audio sent by its ID has the thumbnail it was uploaded with:
         thumbnail: URLInputFile | None = None
-        if self._episode.published_by.document.meta.cover_url:
-            thumbnail = URLInputFile(self._episode.published_by.document.meta.cover_url)
+        if upload and self._episode.podcast.cover_url:
+            thumbnail = URLInputFile(self._episode.podcast.cover_url)
 
-        await self._bot.send_audio(
+        return await self._send_message(
             user_id,
-            file,
-            performer=self._episode.published_by.document.meta.title,
-            title=self._episode.episode.title,
-            thumbnail=thumbnail,
-            disable_notification=True,
-            request_timeout=_AUDIO_FILE_UPLOAD_TIMEOUT,  # todo: investigate
+            lambda: self._bot.send_audio(
+                user_id,
+                file,
+                performer=self._episode.podcast.title,
+                title=self._episode.episode.title,
+                thumbnail=thumbnail,
+                disable_notification=True,
+                request_timeout=_AUDIO_FILE_UPLOAD_TIMEOUT,  # todo: investigate
+            ),
         )
 
     @retry(retry=retry_if_exception_type(aiohttp.ClientConnectorError), wait=wait_exponential(max=60))
@@ -108,63 +190,131 @@ class EpisodeNotificationSender:
             kbd.button(text="Download episode audio", url=self._episode.episode.audio_file.url)
             self._cached_audio_message_inline_markup = kbd.as_markup()
 
-        await self._bot.send_message(
+        await self._send_message(
             user_id,
-            f"🧱 The episode audio file size exceeds Telegram limits, "
-            f"that's why I am not able to send it to you.\n\n"
-            f"You can download it manually using the button below.",
-            reply_markup=self._cached_audio_message_inline_markup,
-            disable_notification=True,
+            lambda: self._bot.send_message(
+                user_id,
+                f"🧱 The episode audio file size exceeds Telegram limits, "
+                f"that's why I am not able to send it to you.\n\n"
+                f"You can download it manually using the button below.",
+                reply_markup=self._cached_audio_message_inline_markup,
+                disable_notification=True,
+            ),
         )
 
 
 class EpisodeBroadcaster:
+    """
+    Delivers episodes from the outbox feed poller adds new episodes to.
+    Every episode is claimed for lease seconds (the claim is extended as the episode is delivered to its recipients),
+    so that broadcasters running at once deliver different episodes, and episodes claimed by a broadcaster
+    which has stopped are claimed by others once their claims expire.
+
+    An episode is delivered to up to concurrency recipients at a time, while messages are sent as fast
+    as Telegram allows (see MessageScheduler), so that delivery to many recipients is not bound by
+    round trips to Telegram. Audio of an episode is downloaded to audio_cache (if provided) as soon as
+    the episode is claimed, while text notifications are being sent.
+    """
+
     _bot: Bot
+    _scheduler: MessageScheduler
+    _media_cache: TelegramMediaCache
+    _audio_cache: AudioCache | None
     _audio_file_size_limit: int
     _interval: int
+    _lease: int
+    _concurrency: int
+    _owner: str  # identifies the broadcaster in claims of episodes
     _upload_audio_chunk_size: int
 
     def __init__(
         self,
-        episodes_queue: Queue[BroadcastableEpisode],
         bot: Bot,
+        scheduler: MessageScheduler,
+        media_cache: TelegramMediaCache,
         interval: int,
+        lease: int,
+        concurrency: int,
+        audio_cache: AudioCache | None = None,
         upload_audio_chunk_size: int = _DEFAULT_UPLOAD_AUDIO_CHUNK_SIZE,
     ):
-        self._episodes_queue = episodes_queue
         self._bot = bot
+        self._scheduler = scheduler
+        self._media_cache = media_cache
         self._interval = interval
+        self._lease = lease
+        self._concurrency = concurrency
+        self._audio_cache = audio_cache
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
         self._upload_audio_chunk_size = upload_audio_chunk_size
 
     async def broadcast_episodes(self) -> None:
         log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
 
         while True:
-            episode = await self._episodes_queue.get()
+            episode = await claim_episode(self._owner, self._lease)
+            if episode is None:
+                await asyncio.sleep(self._interval)
+                continue
 
-            with contextvars.bound_contextvars(episode=episode.episode.title, podcast=episode.published_by.document.meta.title):
+            with contextvars.bound_contextvars(episode=episode.episode.title, podcast=episode.podcast.title):
                 log.info("start broadcasting")
+                await self._prefetch_audio(episode)
+
+                notification_sender = EpisodeNotificationSender(
+                    self._bot, self._scheduler, self._media_cache, self._audio_cache, episode
+                )
+
+                # workers take recipients from the same iterator, so that every recipient is notified once:
+                recipients = iter(episode.recipients)
+                delivered = await asyncio.gather(
+                    *(
+                        self._deliver(episode, notification_sender, recipients)
+                        for _ in range(min(self._concurrency, len(episode.recipients)))
+                    )
+                )
+                if all(delivered):
+                    await episode_delivered(episode, self._owner)
+                    log.info("finish broadcasting")
+                else:
+                    log.warning("stop broadcasting: episode has been claimed by another broadcaster")
+
+            log.info(f"task is sleeping for {self._interval} seconds")
+            await asyncio.sleep(self._interval)
 
-                notification_sender = EpisodeNotificationSender(self._bot, episode)
-
-                for user in episode.recipients:
-                    with contextvars.bound_contextvars(user_id=user.document.user_id):
-                        try:
-                            await notification_sender.send_notification(
-                                user.document.user_id, self._upload_audio_chunk_size
-                            )
-                        except TelegramForbiddenError:
-                            log.info("skipping user as they blocked the bot")
-                            continue
-                        except RetryError:
-                            log.info("skipping user as retrying failed")
-                            continue
-                        except Exception as e:
-                            log.error(f"unexpected exception when sending notification: {e}")
-                            continue
+    async def _prefetch_audio(self, episode: OutboxEpisodeDocument) -> None:
+        # audio which is going to be uploaded is downloaded in background (unless the poller has started it already):
+        audio_file = episode.episode.audio_file
+        if self._audio_cache is None or audio_file.size > _AUDIO_SIZE_LIMIT:
+            return
+        if await self._media_cache.file_id(audio_file.url) is None:
+            self._audio_cache.prefetch(audio_file.url, audio_file.size)
 
+    async def _deliver(
+        self,
+        episode: OutboxEpisodeDocument,
+        notification_sender: EpisodeNotificationSender,
+        recipients: typing.Iterator[int],
+    ) -> bool:
+        """Notifies recipients one by one, returns False if the episode has been claimed by another broadcaster."""
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
+        # every recipient is removed from the episode once the notification is sent to them (or has failed),
+        # so that they are not notified again if delivery is interrupted:
+        for user_id in recipients:
+            with contextvars.bound_contextvars(user_id=user_id):
+                try:
+                    await notification_sender.send_notification(user_id, self._upload_audio_chunk_size)
+                except TelegramForbiddenError:
+                    log.info("skipping user as they blocked the bot")
+                except RetryError:
+                    log.info("skipping user as retrying failed")
+                except Exception as e:
+                    log.error(f"unexpected exception when sending notification: {e}")
+                else:
                     log.info("sent new episode notification to user")
 
-            log.info("finish broadcasting")
-            log.info(f"task is sleeping for {self._interval} seconds")
-            await asyncio.sleep(self._interval)
+            if not await episode_delivered_to(episode, user_id, self._owner, self._lease):
+                return False
+
+        return True
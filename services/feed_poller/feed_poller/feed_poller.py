@@ -1,18 +1,44 @@
 import asyncio
+import os
+import socket
 import time
+import weakref
 from asyncio import Queue
+from dataclasses import dataclass
+from typing import Any
 
 import aiohttp
 import podcastie_rss
 import structlog
-from feed_poller.broadcastable_episode import BroadcastableEpisode
+from beanie import BulkWriter, PydanticObjectId
+from podcastie_core.outbox import add_episode
 from podcastie_core.podcast import generate_podcast_title_slug, is_valid_podcast_title
-from podcastie_core.service import all_podcasts, podcast_followers
-from podcastie_database.models.podcast import PodcastCheckModel, PodcastMetaModel
+from podcastie_core.poll_request import take_poll_request
+from podcastie_core.service import (
+    claim_due_podcasts,
+    claim_podcast,
+    followed_podcast_ids,
+    podcast_followers,
+    polling_podcast,
+    set_podcast_fields,
+    set_podcast_fields_if,
+)
+from podcastie_core.user import User
+from podcastie_database.models.podcast import (
+    PodcastCheckModel,
+    PodcastFeedValidatorsModel,
+    PodcastMetaModel,
+    PodcastPollingModel,
+)
+from podcastie_telegram_media import TelegramMediaCache
 from structlog import contextvars
-from tenacity import AsyncRetrying, RetryError, retry_if_exception_type, wait_exponential
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential
 
-from feed_poller import episode_broadcaster
+from feed_poller.audio_cache import AudioCache
+from feed_poller.check_scheduler import CheckScheduler, update_publication_interval
+from feed_poller.websub import WebSubSubscriber
+
+_FETCH_RETRY_MAX_WAIT = 10  # max pause between attempts to fetch a feed (seconds)
 
 
 def _update_podcast_meta(old_meta: PodcastMetaModel, title: str, description: str, link: str, cover_url: str) -> bool:
@@ -38,88 +64,477 @@ def _update_podcast_meta(old_meta: PodcastMetaModel, title: str, description: st
     return changed
 
 
+def _is_transient_error(e: BaseException) -> bool:
+    """Tells whether fetching the feed failed for a reason which may go away right away (e.g. connection reset)."""
+    if not isinstance(e, podcastie_rss.FeedReadError) or isinstance(e, podcastie_rss.FeedThrottledError):
+        return False
+
+    cause = e.__cause__
+    if isinstance(cause, aiohttp.ClientResponseError):
+        return cause.status >= 500
+    return isinstance(cause, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+@dataclass
+class _PolledFeed:
+    """Result of polling podcast feed, passed from the fetch stage to the write stage."""
+
+    podcast: PodcastPollingModel
+    followed: bool  # whether the podcast has followers, feeds of podcasts without them are not fetched
+    feed: podcastie_rss.Feed | podcastie_rss.FeedNotModified | None  # None if the feed failed to be fetched
+    retry_after: float | None = None  # time the feed host asked to pause requests for (seconds)
+    failure_counted: bool = True  # whether failing to fetch the feed counts towards backing off from it
+
+
 class FeedPoller:
-    _episodes_queue: Queue[BroadcastableEpisode]
+    """
+    Every interval seconds, polls feeds which are due to be checked (see CheckScheduler)
+    in two stages joined by bounded queues, so that a cycle takes about as long as the slowest feeds do
+    rather than as all of them together:
+
+    - fetch stage: up to fetch_workers feeds are fetched at a time. Feeds are parsed while they're being received,
+      so that reading can stop as soon as enough episodes are found (in the parse executor of the client if it has one).
+    - write stage: up to write_workers podcasts are handled at a time. Changed fields of podcasts are saved
+      to the database in bulk writes of up to write_batch_size podcasts. Podcasts with new episodes are saved
+      right away instead, after their episodes are added to the outbox the broadcaster delivers them from.
+
+    Due podcasts are claimed for lease seconds in batches of claim_batch_size (with only the fields needed
+    to check their feeds), so that memory use stays flat however many podcasts there are, and replicas
+    of feed poller running at once check different podcasts. Podcasts claimed by a replica which has stopped
+    are claimed by others once their leases expire. Episodes are never broadcast twice, even if a podcast
+    is checked by two replicas (e.g. when its lease has expired before it has been saved): they're added
+    to the outbox idempotently, and the latest known episode of the podcast is only updated
+    if it has not changed since the podcast was loaded.
+
+    Podcasts found to have no followers become dormant: their feeds are not checked, and they're not looked through
+    anymore until they're followed again (dormant podcasts are deleted after a while, see Compactor).
+
+    Checks requested ahead of schedule (e.g. when a podcast is just followed, see request_poll) are looked for
+    every request_interval seconds between and during cycles, and their podcasts are put to the fetch stage right away.
+
+    Fetching a feed is retried up to fetch_attempts times in a check, and only on transient errors, so that a dead
+    origin holds a fetch worker for seconds at most. Consecutive failed checks are counted per feed, and feeds
+    which keep failing are checked less and less often (see CheckScheduler.backoff_interval) until they recover.
+    """
+
+    _feed_client: podcastie_rss.FeedClient
     _interval: int
+    _request_interval: float
+    _lease: int
+    _claim_batch_size: int
+    _owner: str  # identifies the replica in leases of podcasts it has claimed
+    _fetch_workers: int
+    _write_workers: int
+    _write_batch_size: int
+    _fetch_attempts: int
+    _check_scheduler: CheckScheduler
+    _websub_subscriber: WebSubSubscriber | None
+    _media_cache: TelegramMediaCache | None
+    _audio_cache: AudioCache | None
+    _podcast_locks: weakref.WeakValueDictionary[PydanticObjectId, asyncio.Lock]  # held by those who use them
 
-    def __init__(self, episodes_queue: Queue[BroadcastableEpisode], interval: int):
-        self._episodes_queue = episodes_queue
+    _bulk_writer: BulkWriter  # updates of podcasts which are not saved yet
+    _cycle_running: bool  # whether a polling cycle is in progress, otherwise pending updates are saved right away
+
+    def __init__(
+        self,
+        feed_client: podcastie_rss.FeedClient,
+        interval: int,
+        request_interval: float,
+        lease: int,
+        claim_batch_size: int,
+        fetch_workers: int,
+        write_workers: int,
+        write_batch_size: int,
+        fetch_attempts: int,
+        check_scheduler: CheckScheduler,
+        websub_subscriber: WebSubSubscriber | None = None,
+        media_cache: TelegramMediaCache | None = None,
+        audio_cache: AudioCache | None = None,
+    ):
+        self._feed_client = feed_client
         self._interval = interval
+        self._request_interval = request_interval
+        self._lease = lease
+        self._claim_batch_size = claim_batch_size
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._fetch_workers = fetch_workers
+        self._write_workers = write_workers
+        self._write_batch_size = write_batch_size
+        self._fetch_attempts = fetch_attempts
+        self._check_scheduler = check_scheduler
+        self._websub_subscriber = websub_subscriber
+        self._media_cache = media_cache
+        self._audio_cache = audio_cache
+        self._podcast_locks = weakref.WeakValueDictionary()
+
+        self._bulk_writer = BulkWriter()
+        self._cycle_running = False
+
+    def podcast_lock(self, podcast_id: PydanticObjectId) -> asyncio.Lock:
+        """
+        Returns lock which must be held while new episodes of the podcast are detected,
+        so that episodes of a feed polled and pushed at the same time are not sent for broadcasting twice.
+        The lock is kept only while it's referenced (e.g. while it's held or waited for), so locks of all podcasts
+        are not kept forever.
+        """
+        lock = self._podcast_locks.get(podcast_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._podcast_locks[podcast_id] = lock
+
+        return lock
 
     async def poll_feeds(self) -> None:
         log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
 
+        # queues are bounded, so that podcasts are not loaded into stages faster than they're handled:
+        fetch_queue: Queue[PodcastPollingModel] = Queue(maxsize=self._fetch_workers)
+        write_queue: Queue[_PolledFeed] = Queue(maxsize=self._write_workers)
+        workers = [
+            *(asyncio.create_task(self._fetch_worker(fetch_queue, write_queue)) for _ in range(self._fetch_workers)),
+            *(asyncio.create_task(self._write_worker(write_queue)) for _ in range(self._write_workers)),
+            asyncio.create_task(self._poll_request_worker(fetch_queue)),
+        ]
+
+        try:
+            while True:
+                started = time.monotonic()
+                self._cycle_running = True
+                followed = await followed_podcast_ids()
+                async for podcast in claim_due_podcasts(
+                    int(time.time()), self._owner, self._lease, self._claim_batch_size
+                ):
+                    if podcast.id in followed:
+                        await fetch_queue.put(podcast)
+                    else:
+                        log.bind(podcast=podcast.meta.title).info("skipping podcast: it has no followers")
+                        await write_queue.put(_PolledFeed(podcast=podcast, followed=False, feed=None))
+
+                # fetch workers put results to the write queue before marking podcasts done,
+                # so the write queue is joined only when nothing else can be put to it:
+                await fetch_queue.join()
+                await write_queue.join()
+                await self._flush_writes()
+                self._cycle_running = False
+
+                log.info(f"polling cycle took {time.monotonic() - started:.1f} sec")
+                log.info(f"task is sleeping for {self._interval} sec")
+                await asyncio.sleep(self._interval)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _poll_request_worker(self, fetch_queue: Queue[PodcastPollingModel]) -> None:
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
+        while True:
+            try:
+                podcast_id = await take_poll_request()
+                if podcast_id is None:
+                    # updates of podcasts checked between cycles are not left pending until the next cycle ends:
+                    if not self._cycle_running:
+                        await self._flush_writes()
+                    await asyncio.sleep(self._request_interval)
+                    continue
+
+                # podcasts claimed by others are being checked already:
+                podcast = await claim_podcast(podcast_id, self._owner, self._lease)
+                if podcast is None:
+                    continue
+
+                log.bind(podcast=podcast.meta.title).info("checking podcast ahead of schedule: its check is requested")
+                await fetch_queue.put(podcast)
+            except Exception:
+                log.exception("unexpected exception while serving poll requests")
+                await asyncio.sleep(self._request_interval)
+
+    async def _fetch_worker(self, fetch_queue: Queue[PodcastPollingModel], write_queue: Queue[_PolledFeed]) -> None:
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
         while True:
-            for podcast in await all_podcasts():
-                with contextvars.bound_contextvars(podcast=podcast.document.meta.title):
-                    # check if there are any followers:
-                    followers = await podcast_followers(podcast)
-                    if not followers:
-                        # todo: delete podcasts that does not have followers
-                        # for SOME amount of time
-                        log.info("skipping podcast: it has no followers")
-                        continue
-
-                    # fetch podcast RSS feed:
-                    feed: podcastie_rss.Feed | None = None
-                    try:
-                        async for attempt in AsyncRetrying(
-                            retry=retry_if_exception_type(aiohttp.ClientConnectorError), wait=wait_exponential(max=60)
-                        ):
-                            with attempt:
-                                feed = await podcastie_rss.fetch_feed(podcast.document.feed_url)
-                    except podcastie_rss.FeedError as e:
-                        log.bind(e=e).warning("skipping podcast: feed error when attempting to fetch feed")
-                        continue
-                    except RetryError:
-                        log.exception("skipping podcast: retrying error")
-                        continue
-                    except Exception:
-                        log.exception("skipping podcast: unexpected exception while attempting to fetch feed")
-                        continue
-                    finally:
-                        # update information about latest podcast check:
-                        podcast.document.check = PodcastCheckModel(timestamp=int(time.time()), success=bool(feed))
-                        await podcast.save_changes()
-
-                    # update podcast metadata if it has changed:
-                    meta_changed = _update_podcast_meta(
-                        podcast.document.meta,
-                        title=feed.title,
-                        description=feed.description,
-                        link=feed.link,
-                        cover_url=feed.cover_url,
+            podcast = await fetch_queue.get()
+            try:
+                with contextvars.bound_contextvars(podcast=podcast.meta.title):
+                    await write_queue.put(await self._fetch(podcast))
+            except Exception:
+                log.exception("skipping podcast: unexpected exception while polling it")
+            finally:
+                fetch_queue.task_done()
+
+    async def _write_worker(self, write_queue: Queue[_PolledFeed]) -> None:
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
+        while True:
+            polled_feed = await write_queue.get()
+            try:
+                with contextvars.bound_contextvars(podcast=polled_feed.podcast.meta.title):
+                    async with self.podcast_lock(polled_feed.podcast.id):
+                        await self._write(polled_feed)
+            except Exception:
+                log.exception("skipping podcast: unexpected exception while saving it")
+            finally:
+                write_queue.task_done()
+
+    async def _fetch(self, podcast: PodcastPollingModel) -> _PolledFeed:
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
+        # fetch episodes published after the latest known one from podcast RSS feed
+        # (conditionally, using validators from the previous fetch):
+        validators = podcastie_rss.FeedValidators(
+            etag=podcast.feed_validators.etag,
+            last_modified=podcast.feed_validators.last_modified,
+            digest=podcast.feed_validators.digest,
+        )
+        feed: podcastie_rss.Feed | podcastie_rss.FeedNotModified | None = None
+        retry_after: float | None = None
+        failure_counted = True
+        try:
+            # transient errors are retried a few times, the feed is checked again later if they persist:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_exception(_is_transient_error),
+                stop=stop_after_attempt(self._fetch_attempts),
+                wait=wait_exponential(max=_FETCH_RETRY_MAX_WAIT),
+                reraise=True,
+            ):
+                with attempt:
+                    feed = await podcastie_rss.fetch_feed(
+                        self._feed_client,
+                        podcast.feed_url,
+                        validators,
+                        since=podcast.latest_episode_publication_timestamp,
                     )
-                    if meta_changed:
-                        await podcast.save_changes()
-
-                    # skip podcast if it does not have any episodes:
-                    if not feed.latest_episode:
-                        log.debug("skipping podcast: it has no episodes")
-                        continue
-
-                    if (podcast.document.latest_episode_publication_timestamp is None) or (
-                        feed.latest_episode.published > podcast.document.latest_episode_publication_timestamp
-                    ):
-                        with contextvars.bound_contextvars(episode=feed.latest_episode.title):
-                            log.info("a new episode is out")
-
-                            # update latest episode timestamp in the database:
-                            podcast.document.latest_episode_publication_timestamp = feed.latest_episode.published
-                            await podcast.save_changes()
-
-                            # skip episode if it does not contain title or audio file:
-                            if not feed.latest_episode.title or not feed.latest_episode.audio_file:
-                                log.info("skipping episode: it does not contain title or audio")
-                                continue
-
-                            log.info("sending episode for broadcasting")
-                            episode = episode_broadcaster.BroadcastableEpisode(
-                                recipients=followers,
-                                episode=feed.latest_episode,
-                                published_by=podcast,
-                            )
-                            await self._episodes_queue.put(episode)
-
-            log.info(f"task is sleeping for {self._interval} sec")
-            await asyncio.sleep(self._interval)
+        except podcastie_rss.FeedThrottledError as e:
+            log.bind(retry_after=e.retry_after).info("skipping podcast: feed host asked to pause requests")
+            retry_after = e.retry_after
+            failure_counted = False
+        except podcastie_rss.FeedTooLargeError as e:
+            # the feed is not broken, so it's not backed off from, but is tried again at the usual interval
+            # (the limit may be raised meanwhile):
+            log.bind(e=e).warning("skipping podcast: feed is too large")
+            failure_counted = False
+        except podcastie_rss.FeedError as e:
+            log.bind(e=e).warning("skipping podcast: feed error when attempting to fetch feed")
+        except Exception:
+            log.exception("skipping podcast: unexpected exception while attempting to fetch feed")
+
+        # the result is saved even if the feed failed to be fetched, as the check is recorded anyway:
+        return _PolledFeed(
+            podcast=podcast, followed=True, feed=feed, retry_after=retry_after, failure_counted=failure_counted
+        )
+
+    async def _write(self, polled_feed: _PolledFeed) -> None:
+        """Saves result of polling podcast feed. The podcast lock must be held."""
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
+        podcast, feed = polled_feed.podcast, polled_feed.feed
+
+        # podcasts without followers become dormant, they're not checked until they're followed again:
+        if not polled_feed.followed:
+            await self._save(podcast, {"dormant_since": int(time.time()), "lease": None})
+            return
+
+        # content may have been pushed since the podcast was loaded, then the latest known episode is outdated:
+        if podcast.websub is not None:
+            podcast = await polling_podcast(podcast.id)
+            if podcast is None:
+                log.info("skipping podcast: it has been deleted")
+                return
+
+        # update information about latest podcast check,
+        # failures are counted until the feed is fetched again
+        # (checks the host asked to pause and checks of feeds which are too large are not counted):
+        failures = podcast.check.failures
+        if feed:
+            failures = 0
+        elif polled_feed.failure_counted:
+            failures += 1
+        podcast.check = PodcastCheckModel(timestamp=int(time.time()), success=bool(feed), failures=failures)
+        fields: dict[str, Any] = {"check": podcast.check}
+        if feed:
+            fields["feed_validators"] = PodcastFeedValidatorsModel(
+                etag=feed.validators.etag,
+                last_modified=feed.validators.last_modified,
+                digest=feed.validators.digest,
+            )
+
+        # subscribe to the feed if it's delivered by WebSub hub, renew or drop the subscription if needed:
+        if self._websub_subscriber is not None:
+            if isinstance(feed, podcastie_rss.Feed):
+                await self._websub_subscriber.update_subscription(podcast, feed.websub)
+            elif feed is not None:
+                await self._websub_subscriber.renew_subscription(podcast)
+
+        latest_known = podcast.latest_episode_publication_timestamp
+        new_episodes: list[podcastie_rss.Episode] | None = None
+        if isinstance(feed, podcastie_rss.Feed):
+            cover_url = podcast.meta.cover_url
+            new_episodes = self._update_podcast(podcast, feed, fields)
+            await self._forget_cover(cover_url, podcast)
+
+        # schedule the next check and release the podcast, all changed fields of the podcast are saved at once:
+        fields["next_check_at"] = self._check_scheduler.next_check_at(self._check_interval(podcast, polled_feed))
+        fields["lease"] = None
+
+        # skip broadcasting if the feed failed to be fetched, has not changed since the last check or has no new ones:
+        if new_episodes is None:
+            if feed is not None:
+                log.debug("skipping podcast: feed has not been modified")
+        elif not new_episodes:
+            log.debug("skipping podcast: it has no new episodes")
+
+        await self._save(podcast, fields, latest_known, new_episodes)
+
+    async def _save(
+        self,
+        podcast: PodcastPollingModel,
+        fields: dict[str, Any],
+        latest_known: int | None = None,
+        new_episodes: list[podcastie_rss.Episode] | None = None,
+    ) -> None:
+        """
+        Saves changed fields of the podcast and sends its new episodes for broadcasting.
+        latest_known is the latest known episode of the podcast when it was loaded (publication timestamp).
+        """
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
+        if not new_episodes:
+            await set_podcast_fields(podcast.id, fields, bulk_writer=self._bulk_writer)
+            if len(self._bulk_writer.operations) >= self._write_batch_size:
+                await self._flush_writes()
+            return
+
+        # new episodes are added to the outbox before the latest known episode is updated,
+        # so that they're detected again rather than lost if feed poller stops in between:
+        await self._broadcast(podcast, new_episodes)
+
+        # podcasts with new episodes are saved right away, and only if the latest known episode has not changed,
+        # which tells that episodes have been handled meanwhile (by another replica, or when they were pushed):
+        if not await set_podcast_fields_if(podcast.id, {"latest_episode_publication_timestamp": latest_known}, fields):
+            log.info("skipping podcast: its new episodes have been handled meanwhile")
+
+    async def _flush_writes(self) -> None:
+        """Saves pending updates of podcasts in a single bulk write."""
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
+        # pending updates are taken at once, so that the write stage can add new ones during the write:
+        bulk_writer, self._bulk_writer = self._bulk_writer, BulkWriter()
+        if not bulk_writer.operations:
+            return
+
+        # podcasts which failed to be saved are checked again once their leases expire:
+        try:
+            await bulk_writer.commit()
+        except Exception:
+            log.bind(podcasts=len(bulk_writer.operations)).exception("failed to save podcasts")
+
+    def _check_interval(self, podcast: PodcastPollingModel, polled_feed: _PolledFeed) -> float:
+        feed = polled_feed.feed
+
+        # feeds pushed by WebSub hubs are only polled once in a while, in case the hub misses an update:
+        if self._websub_subscriber is not None:
+            interval = self._websub_subscriber.check_interval(podcast)
+            if interval is not None:
+                return interval
+
+        # feeds which keep failing are backed off from (still not sooner than their hosts asked to):
+        if podcast.check.failures:
+            return max(self._check_scheduler.backoff_interval(podcast.check.failures), polled_feed.retry_after or 0)
+
+        # the feed is not checked sooner than its server asked to:
+        not_sooner_than = polled_feed.retry_after
+        if isinstance(feed, podcastie_rss.Feed):
+            not_sooner_than = max(feed.max_age or 0, feed.ttl or 0)
+        elif feed is not None:
+            not_sooner_than = feed.max_age
+
+        return self._check_scheduler.check_interval(podcast, not_sooner_than)
+
+    async def process_feed(self, podcast: PodcastPollingModel, feed: podcastie_rss.Feed) -> None:
+        """
+        Updates the podcast according to its feed pushed by WebSub hub and sends its new episodes for broadcasting,
+        as it's done for polled feeds. The podcast lock must be held.
+        """
+        fields: dict[str, Any] = {}
+        latest_known = podcast.latest_episode_publication_timestamp
+        cover_url = podcast.meta.cover_url
+        new_episodes = self._update_podcast(podcast, feed, fields)
+        await self._forget_cover(cover_url, podcast)
+        if new_episodes:
+            await self._save(podcast, fields, latest_known, new_episodes)
+        elif fields:
+            await set_podcast_fields(podcast.id, fields)
+
+    async def _forget_cover(self, cover_url: str | None, podcast: PodcastPollingModel) -> None:
+        """Forgets file ID of the previous cover of the podcast if the cover has changed, as it's not sent anymore."""
+        if self._media_cache is not None and cover_url is not None and cover_url != podcast.meta.cover_url:
+            await self._media_cache.forget(cover_url)
+
+    @staticmethod
+    def _update_podcast(
+        podcast: PodcastPollingModel, feed: podcastie_rss.Feed, fields: dict[str, Any]
+    ) -> list[podcastie_rss.Episode]:
+        """
+        Updates the podcast according to its feed, without saving it: changed fields are put to fields to be set.
+        Returns new episodes.
+        """
+        # update podcast metadata if it has changed:
+        if _update_podcast_meta(
+            podcast.meta,
+            title=feed.title,
+            description=feed.description,
+            link=feed.link,
+            cover_url=feed.cover_url,
+        ):
+            fields["meta"] = podcast.meta
+
+        # episodes may have been handled since the feed was fetched (e.g. when they were pushed meanwhile):
+        latest_known = podcast.latest_episode_publication_timestamp
+        new_episodes = [
+            episode for episode in feed.episodes if latest_known is None or episode.published > latest_known
+        ]
+
+        # update publishing cadence and latest episode timestamp:
+        if new_episodes:
+            update_publication_interval(podcast, new_episodes)
+            podcast.latest_episode_publication_timestamp = new_episodes[-1].published
+            fields["publication_interval"] = podcast.publication_interval
+            fields["latest_episode_publication_timestamp"] = podcast.latest_episode_publication_timestamp
+
+        return new_episodes
+
+    async def _broadcast(self, podcast: PodcastPollingModel, new_episodes: list[podcastie_rss.Episode]) -> None:
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
+        # skip podcast if there are no new episodes:
+        if not new_episodes:
+            log.debug("skipping podcast: it has no new episodes")
+            return
+
+        # new episodes are sent for broadcasting in publication order,
+        # followers are only loaded when there is an episode to broadcast:
+        followers: list[User] | None = None
+        for new_episode in new_episodes:
+            with contextvars.bound_contextvars(episode=new_episode.title):
+                log.info("a new episode is out")
+
+                # skip episode if it does not contain title or audio file:
+                if not new_episode.title or not new_episode.audio_file:
+                    log.info("skipping episode: it does not contain title or audio")
+                    continue
+
+                if followers is None:
+                    followers = await podcast_followers(podcast.id)
+                if not followers:
+                    log.info("skipping episode: podcast has no followers")
+                    continue
+
+                log.info("sending episode for broadcasting")
+                await add_episode(
+                    podcast.id, podcast.meta, new_episode, [follower.document.user_id for follower in followers]
+                )
+
+                # the audio is downloaded while the episode waits in the outbox and its notifications are sent:
+                if self._audio_cache is not None:
+                    self._audio_cache.prefetch(new_episode.audio_file.url, new_episode.audio_file.size)
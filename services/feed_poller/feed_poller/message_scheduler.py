@@ -0,0 +1,58 @@
+import asyncio
+
+_FORGET_CHATS_AT = 10000  # number of remembered chats, chats which may be sent to right away are forgotten then
+
+
+class MessageScheduler:
+    """
+    Schedules messages sent by the bot so that they're sent as fast as Telegram allows, but no faster.
+
+    Messages to all chats are limited to rate per second, with bursts of up to burst messages (token bucket),
+    and messages to the same chat are spaced by at least chat_interval seconds. Telegram may ask to pause
+    sending messages for a while (see throttle), then messages to all chats are delayed until then.
+    """
+
+    _rate: float
+    _burst: int
+    _chat_interval: float
+    _next_start: float  # loop time the bucket is empty until, as if it was refilled with a message at a time
+    _throttled_until: float  # loop time Telegram asked not to send messages until
+    _chats: dict[int, float]  # loop time the next message to a chat may be sent at
+
+    def __init__(self, rate: float, burst: int, chat_interval: float):
+        self._rate = rate
+        self._burst = burst
+        self._chat_interval = chat_interval
+        self._next_start = 0
+        self._throttled_until = 0
+        self._chats = {}
+
+    def throttle(self, delay: float) -> None:
+        """Pauses sending messages for delay seconds (e.g. when Telegram responds with retry_after)."""
+        self._throttled_until = max(self._throttled_until, asyncio.get_running_loop().time() + delay)
+
+    async def wait(self, chat_id: int) -> None:
+        """Waits until a message can be sent to the chat."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            # send time is reserved before sleeping, so that messages waiting at once are spaced too.
+            # a message may be sent while the bucket is less than burst messages ahead of the current time:
+            now = loop.time()
+            start = max(
+                now,
+                self._chats.get(chat_id, 0),
+                self._next_start - (self._burst - 1) / self._rate,
+                self._throttled_until,
+            )
+            self._next_start = max(self._next_start, start) + 1 / self._rate
+            self._chats[chat_id] = start + self._chat_interval
+            if len(self._chats) > _FORGET_CHATS_AT:
+                self._chats = {chat: at for chat, at in self._chats.items() if at > now}
+
+            if start > now:
+                await asyncio.sleep(start - now)
+
+            # Telegram may have asked to pause while sleeping, then the send time is reserved again:
+            if loop.time() >= self._throttled_until:
+                return
@@ -0,0 +1,115 @@
+import asyncio
+import secrets
+import time
+
+import aiohttp
+import podcastie_rss
+import structlog
+from podcastie_core.service import set_podcast_fields
+from podcastie_database.models.podcast import PodcastPollingModel, PodcastWebSubModel
+
+_LEASE_RENEWAL_MARGIN = 60 * 60  # time before lease expiration the subscription is renewed at (seconds)
+_REQUEST_RETRY_INTERVAL = 60 * 60  # time after which a request the hub has not verified is repeated (seconds)
+
+
+class WebSubSubscriber:
+    """
+    Subscribes to podcast feeds delivered by WebSub hubs, so that hubs push feed updates to the callback server
+    instead of the feeds being polled.
+
+    Subscriptions are managed when feeds are polled: a subscription is requested as soon as a feed advertising a hub
+    is polled (the hub may have been found when the podcast was added already), and it's renewed when the lease
+    is about to expire. Until then, pushed feeds are only polled every fallback_interval seconds,
+    in case the hub misses an update.
+    """
+
+    _session: aiohttp.ClientSession
+    _callback_url: str
+    _lease: int
+    _fallback_interval: int
+
+    def __init__(self, session: aiohttp.ClientSession, callback_url: str, lease: int, fallback_interval: int):
+        self._session = session
+        self._callback_url = callback_url.rstrip("/")
+        self._lease = lease
+        self._fallback_interval = fallback_interval
+
+    def check_interval(self, podcast: PodcastPollingModel) -> float | None:
+        """
+        Returns interval the podcast feed should be polled at if it's pushed by its hub (seconds), None otherwise.
+        The feed is polled in time to renew the subscription before its lease expires.
+        """
+        if not self._active(podcast):
+            return None
+
+        renewal_in = podcast.websub.lease_expires_at - _LEASE_RENEWAL_MARGIN - time.time()
+        return min(self._fallback_interval, renewal_in)
+
+    async def update_subscription(self, podcast: PodcastPollingModel, links: podcastie_rss.WebSubLinks | None) -> None:
+        """Requests, renews or drops subscription to the podcast feed according to WebSub links it advertises."""
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
+        websub = podcast.websub
+        if links is None:
+            if websub is not None:
+                log.info("dropping WebSub subscription: feed does not advertise hub anymore")
+                podcast.websub = None
+                await set_podcast_fields(podcast.id, {"websub": None})
+            return
+
+        if websub is None or websub.hub_url != links.hub_url or websub.topic_url != links.topic_url:
+            podcast.websub = PodcastWebSubModel(
+                hub_url=links.hub_url,
+                topic_url=links.topic_url,
+                secret=secrets.token_hex(32),
+                requested_at=int(time.time()),
+            )
+            await set_podcast_fields(podcast.id, {"websub": podcast.websub})
+            await self._request_subscription(podcast.websub, self.callback_url(podcast))
+            return
+
+        await self.renew_subscription(podcast)
+
+    async def renew_subscription(self, podcast: PodcastPollingModel) -> None:
+        """Requests subscription to the podcast feed unless it's active or has been requested recently."""
+        websub = podcast.websub
+        if websub is None or self._active(podcast) or websub.requested_at + _REQUEST_RETRY_INTERVAL > time.time():
+            return
+
+        # the secret is kept, as the hub signs pushed content with the old one until it verifies the renewal,
+        # and only the request time is set, as the hub may verify the subscription (and set its lease) meanwhile:
+        websub.requested_at = int(time.time())
+        await set_podcast_fields(podcast.id, {"websub.requested_at": websub.requested_at})
+        await self._request_subscription(websub, self.callback_url(podcast))
+
+    def callback_url(self, podcast: PodcastPollingModel) -> str:
+        return f"{self._callback_url}/{podcast.id}"
+
+    @staticmethod
+    def _active(podcast: PodcastPollingModel) -> bool:
+        """Whether the hub pushes updates of the podcast feed and the subscription does not have to be renewed yet."""
+        websub = podcast.websub
+        if websub is None or websub.lease_expires_at is None:
+            return False
+
+        return websub.lease_expires_at - _LEASE_RENEWAL_MARGIN > time.time()
+
+    async def _request_subscription(self, websub: PodcastWebSubModel, callback_url: str) -> None:
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__, hub=websub.hub_url)
+
+        # the hub verifies the request by calling back, see WebSubCallback:
+        data = {
+            "hub.mode": "subscribe",
+            "hub.topic": websub.topic_url,
+            "hub.callback": callback_url,
+            "hub.lease_seconds": str(self._lease),
+            "hub.secret": websub.secret,
+        }
+        try:
+            async with self._session.post(websub.hub_url, data=data) as response:
+                response.raise_for_status()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log.bind(e=e).warning("failed to request WebSub subscription")
+            return
+
+        log.info("requested WebSub subscription")
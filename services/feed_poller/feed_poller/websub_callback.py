@@ -0,0 +1,143 @@
+import hmac
+import time
+
+import podcastie_rss
+import structlog
+from aiohttp import web
+from beanie import PydanticObjectId
+from podcastie_core.podcast import Podcast, PodcastNotFoundError
+from podcastie_core.service import polling_podcast
+from structlog import contextvars
+
+from feed_poller.feed_poller import FeedPoller
+
+# hash functions hubs may sign pushed content with:
+_SIGNATURE_METHODS = {"sha1", "sha256", "sha384", "sha512"}
+
+
+def _valid_signature(secret: str, signature: str | None, content: bytes) -> bool:
+    """Checks X-Hub-Signature header value, which is the hash function name and the HMAC of the content."""
+    if not signature:
+        return False
+
+    method, _, digest = signature.partition("=")
+    if method not in _SIGNATURE_METHODS:
+        return False
+
+    return hmac.compare_digest(hmac.new(secret.encode(), content, method).hexdigest(), digest.lower())
+
+
+def _podcast_id(request: web.Request) -> PydanticObjectId | None:
+    podcast_id = request.match_info["podcast_id"]
+    if not PydanticObjectId.is_valid(podcast_id):
+        return None
+
+    return PydanticObjectId(podcast_id)
+
+
+async def _load_podcast(request: web.Request) -> Podcast | None:
+    podcast_id = _podcast_id(request)
+    if podcast_id is None:
+        return None
+
+    try:
+        return await Podcast.from_object_id(podcast_id)
+    except PodcastNotFoundError:
+        return None
+
+
+class WebSubCallback:
+    """
+    Callback server WebSub hubs verify subscriptions with and push feed content to.
+    Pushed content goes through the same episode detection as polled feeds do, see FeedPoller.process_feed.
+
+    Every podcast has its own callback URL (see WebSubSubscriber.callback_url): {callback server root}/{podcast id}.
+    """
+
+    _feed_poller: FeedPoller
+    _feed_client: podcastie_rss.FeedClient
+
+    def __init__(self, feed_poller: FeedPoller, feed_client: podcastie_rss.FeedClient):
+        self._feed_poller = feed_poller
+        self._feed_client = feed_client
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=self._feed_client.max_body_size)
+        app.router.add_get("/{podcast_id}", self._verify)
+        app.router.add_post("/{podcast_id}", self._receive)
+        return app
+
+    async def _verify(self, request: web.Request) -> web.Response:
+        """Confirms (un)subscription the hub is asked for by echoing the challenge if the request is expected."""
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
+        mode = request.query.get("hub.mode")
+        topic = request.query.get("hub.topic")
+        podcast = await _load_podcast(request)
+        websub = podcast.document.websub if podcast else None
+        subscribed = websub is not None and websub.topic_url == topic
+
+        if mode == "subscribe" and subscribed:
+            lease_seconds = request.query.get("hub.lease_seconds", "")
+            if not lease_seconds.isdigit():
+                return web.Response(status=400)
+
+            websub.lease_expires_at = int(time.time()) + int(lease_seconds)
+            await podcast.save_changes()
+
+            log.bind(podcast=podcast.document.meta.title, lease_seconds=lease_seconds).info(
+                "WebSub subscription verified"
+            )
+            return web.Response(text=request.query.get("hub.challenge", ""))
+
+        # unsubscription is only confirmed if the feed is not (or no longer) subscribed to:
+        if mode == "unsubscribe" and not subscribed:
+            return web.Response(text=request.query.get("hub.challenge", ""))
+
+        # denied subscriptions are requested again later, see WebSubSubscriber.renew_subscription:
+        if mode == "denied" and subscribed:
+            log.bind(podcast=podcast.document.meta.title, reason=request.query.get("hub.reason")).warning(
+                "WebSub subscription denied"
+            )
+            return web.Response()
+
+        return web.Response(status=404)
+
+    async def _receive(self, request: web.Request) -> web.Response:
+        """Handles feed content pushed by the hub. Success is responded whatever the content is, as WebSub requires."""
+        log: structlog.stdlib.BoundLogger = structlog.get_logger(task=self.__class__.__name__)
+
+        content = await request.read()
+        podcast_id = _podcast_id(request)
+        podcast = await polling_podcast(podcast_id) if podcast_id else None
+
+        # 410 asks the hub to stop pushing content of feeds which are not subscribed to:
+        if podcast is None or podcast.websub is None:
+            return web.Response(status=410)
+
+        with contextvars.bound_contextvars(podcast=podcast.meta.title):
+            if not _valid_signature(podcast.websub.secret, request.headers.get("X-Hub-Signature"), content):
+                log.warning("ignoring pushed content: signature is invalid")
+                return web.Response(status=202)
+
+            async with self._feed_poller.podcast_lock(podcast.id):
+                # the podcast is reloaded, as the latest known episode may have changed while waiting for the lock:
+                podcast = await polling_podcast(podcast.id)
+                if podcast is None:
+                    return web.Response(status=410)
+
+                try:
+                    feed = await podcastie_rss.parse_feed(
+                        self._feed_client,
+                        podcast.feed_url,
+                        content,
+                        since=podcast.latest_episode_publication_timestamp,
+                    )
+                except podcastie_rss.FeedError as e:
+                    log.bind(e=e).warning("ignoring pushed content: feed error when attempting to parse it")
+                    return web.Response(status=202)
+
+                log.info("received pushed feed content")
+                await self._feed_poller.process_feed(podcast, feed)
+
+        return web.Response(status=202)
@@ -0,0 +1,147 @@
+"""
+Minimal WebSub hub for trying out push ingestion of the feed poller locally.
+
+Subscriptions are accepted and verified as a real hub does, and are kept in memory only.
+Publishing is triggered the way publishers ping hubs: POST / with hub.mode=publish and hub.url={topic URL}.
+The hub then fetches the topic and pushes its content, signed with sha256, to every subscriber of it.
+
+Usage: python scripts/websub_hub.py [--host HOST] [--port PORT]
+
+Set FEED_POLLER_WEBSUB_CALLBACK_URL and serve a feed advertising this hub, e.g.:
+<atom:link rel="hub" href="http://localhost:8090/"/> <atom:link rel="self" href="{feed URL}"/>
+Then publish it: curl -d hub.mode=publish -d hub.url={feed URL} http://localhost:8090/
+"""
+
+import argparse
+import asyncio
+import hmac
+import secrets
+import typing
+from dataclasses import dataclass
+
+import aiohttp
+from aiohttp import web
+
+_MAX_LEASE = 10 * 24 * 60 * 60  # max lease granted to subscribers (seconds)
+
+
+@dataclass
+class _Subscription:
+    topic_url: str
+    callback_url: str
+    secret: str | None
+
+
+class _Hub:
+    _session: aiohttp.ClientSession
+    _subscriptions: dict[tuple[str, str], _Subscription]  # subscriptions by topic URL and callback URL
+    _tasks: set[asyncio.Task]
+
+    def __init__(self, session: aiohttp.ClientSession):
+        self._session = session
+        self._subscriptions = {}
+        self._tasks = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        mode = form.get("hub.mode")
+
+        if mode in ("subscribe", "unsubscribe"):
+            topic_url, callback_url = form.get("hub.topic"), form.get("hub.callback")
+            if not topic_url or not callback_url:
+                return web.Response(status=400, text="hub.topic and hub.callback are required")
+
+            lease = min(int(form.get("hub.lease_seconds") or _MAX_LEASE), _MAX_LEASE)
+            subscription = _Subscription(topic_url=topic_url, callback_url=callback_url, secret=form.get("hub.secret"))
+            self._spawn(self._verify(mode, subscription, lease))
+            return web.Response(status=202)
+
+        if mode == "publish":
+            topic_url = form.get("hub.url") or form.get("hub.topic")
+            if not topic_url:
+                return web.Response(status=400, text="hub.url is required")
+
+            self._spawn(self._publish(topic_url))
+            return web.Response(status=202)
+
+        return web.Response(status=400, text=f"unsupported hub.mode: {mode}")
+
+    def _spawn(self, coroutine: typing.Coroutine) -> None:
+        task = asyncio.create_task(self._report_errors(coroutine))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _report_errors(coroutine: typing.Coroutine) -> None:
+        try:
+            await coroutine
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"request failed: {e!r}")
+
+    async def _verify(self, mode: str, subscription: _Subscription, lease: int) -> None:
+        challenge = secrets.token_hex(16)
+        params = {
+            "hub.mode": mode,
+            "hub.topic": subscription.topic_url,
+            "hub.challenge": challenge,
+            "hub.lease_seconds": str(lease),
+        }
+        async with self._session.get(subscription.callback_url, params=params) as response:
+            verified = response.status < 300 and await response.text() == challenge
+
+        print(f"{mode} {subscription.callback_url} to {subscription.topic_url}: verified={verified}")
+        if not verified:
+            return
+
+        key = (subscription.topic_url, subscription.callback_url)
+        if mode == "subscribe":
+            self._subscriptions[key] = subscription
+        else:
+            self._subscriptions.pop(key, None)
+
+    async def _publish(self, topic_url: str) -> None:
+        async with self._session.get(topic_url) as response:
+            content = await response.read()
+            content_type = response.headers.get("Content-Type", "application/rss+xml")
+
+        for subscription in list(self._subscriptions.values()):
+            if subscription.topic_url != topic_url:
+                continue
+
+            headers = {"Content-Type": content_type, "Link": f'<{topic_url}>; rel="self"'}
+            if subscription.secret:
+                signature = hmac.new(subscription.secret.encode(), content, "sha256").hexdigest()
+                headers["X-Hub-Signature"] = f"sha256={signature}"
+
+            async with self._session.post(subscription.callback_url, data=content, headers=headers) as response:
+                print(f"pushed {len(content)} bytes of {topic_url} to {subscription.callback_url}: {response.status}")
+                if response.status == 410:
+                    self._subscriptions.pop((topic_url, subscription.callback_url), None)
+
+
+async def _serve(host: str, port: int) -> None:
+    async with aiohttp.ClientSession() as session:
+        app = web.Application()
+        app.router.add_post("/", _Hub(session).handle)
+
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        print(f"hub is listening on http://{host}:{port}/")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Run a minimal local WebSub hub.")
+    arg_parser.add_argument("--host", default="localhost")
+    arg_parser.add_argument("--port", type=int, default=8090)
+    args = arg_parser.parse_args()
+
+    asyncio.run(_serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()